@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import ast
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from typing import Callable, Iterable
+
+from . import db
+from .parser import WeatherData
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """Declarative alert definition.
+
+    The rule is on when any of *fields* reaches *onset* (or drops below it when
+    *below* is set) or any of *phenomena* is reported. Once on, it stays on until the
+    value passes *clear* and none of the phenomena remain – the gap between *onset*
+    and *clear* is the hysteresis band. A rule that cleared less than *cooldown* ago
+    turns back on silently, and a silent onset is later cleared silently too.
+    """
+
+    key: str
+    message: str
+    clear_message: str
+    fields: tuple[str, ...] = ()
+    onset: float | None = None
+    clear: float | None = None
+    below: bool = False
+    phenomena: frozenset[str] = frozenset()
+    cooldown: timedelta = timedelta(hours=1)
+
+
+ALERT_RULES: tuple[AlertRule, ...] = (
+    AlertRule("heat", "🔥 Сильная жара", "✅ Жара спала", fields=("temperature_c",), onset=30, clear=28),
+    AlertRule("rain", "☔ Дождь", "✅ Дождь прекратился", phenomena=frozenset({"RA"})),
+    AlertRule("thunder", "⛈️ Гроза", "✅ Гроза прекратилась", phenomena=frozenset({"TS"}), cooldown=timedelta(hours=2)),
+    AlertRule("hail", "🌨️ Град", "✅ Град прекратился", phenomena=frozenset({"GR", "GS"})),
+    AlertRule(
+        "wind",
+        "💨 Сильный ветер",
+        "✅ Ветер ослаб",
+        fields=("wind_gust_kt", "wind_speed_kt"),
+        onset=30,
+        clear=25,
+    ),
+    AlertRule(
+        "fog",
+        "🌫️ Туман",
+        "✅ Туман рассеялся",
+        fields=("visibility_m",),
+        onset=1000,
+        clear=1500,
+        below=True,
+        phenomena=frozenset({"FG"}),
+    ),
+)
+
+
+def phenomena_codes(data: WeatherData) -> frozenset[str]:
+    """Return two-letter weather codes (RA, TS, FG, ...) present in *data*.
+
+    ``WeatherData.phenomena`` holds python-metar weather tuples rendered as strings,
+    e.g. ``"('+', 'TS', 'RA', None, None)"``; plain tokens like ``"+TSRA"`` work too.
+    """
+    codes: set[str] = set()
+    for item in data.phenomena or []:
+        parts: Iterable
+        if item.startswith("("):
+            try:
+                parts = ast.literal_eval(item)
+            except (ValueError, SyntaxError):
+                parts = (item,)
+        else:
+            parts = (item,)
+        for part in parts:
+            token = (part or "").lstrip("+-")
+            if token.startswith("VC"):
+                token = token[2:]
+            codes.update(token[i : i + 2] for i in range(0, len(token) - 1, 2))
+    return frozenset(codes)
+
+
+@dataclass
+class _CompiledRule:
+    rule: AlertRule
+    value: Callable[[WeatherData], float | None]
+
+    def check(self, data: WeatherData, codes: frozenset[str], active: bool) -> bool:
+        rule = self.rule
+        if rule.phenomena and not rule.phenomena.isdisjoint(codes):
+            return True
+        if rule.onset is None:
+            return False
+        value = self.value(data)
+        if value is None:
+            return active  # no measurement – keep previous state
+        threshold = rule.clear if active and rule.clear is not None else rule.onset
+        return value < threshold if rule.below else value >= threshold
+
+
+def _compile(rule: AlertRule) -> _CompiledRule:
+    if not rule.fields:
+        return _CompiledRule(rule, lambda d: None)
+    getter = attrgetter(*rule.fields)
+    if len(rule.fields) == 1:
+        return _CompiledRule(rule, getter)
+    pick = min if rule.below else max
+
+    def _value(d: WeatherData) -> float | None:
+        present = [v for v in getter(d) if v is not None]
+        return pick(present) if present else None
+
+    return _CompiledRule(rule, _value)
+
+
+@dataclass
+class Transition:
+    icao: str
+    rule: AlertRule
+    onset: bool
+
+    @property
+    def message(self) -> str:
+        return self.rule.message if self.onset else self.rule.clear_message
+
+
+@dataclass
+class _State:
+    active: bool = False
+    announced: bool = False
+    cleared_at: datetime | None = None
+
+
+@dataclass
+class AlertEngine:
+    """Evaluates compiled rules over a batch of observations with persisted state."""
+
+    rules: Iterable[AlertRule] = ALERT_RULES
+    _compiled: list[_CompiledRule] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._compiled = [_compile(r) for r in self.rules]
+
+    def matches(self, data: WeatherData) -> list[AlertRule]:
+        """Stateless check: rules whose onset condition holds for *data*."""
+        codes = phenomena_codes(data)
+        return [c.rule for c in self._compiled if c.check(data, codes, False)]
+
+    def assess(
+        self, batch: Iterable[WeatherData], chat: str, now: datetime | None = None
+    ) -> tuple[dict[str, list[Transition]], dict[str, list[tuple]]]:
+        """Advance *chat*'s alert state for every station in *batch* without saving it.
+
+        Returns the transitions and the state rows per station. State for the whole
+        batch is read in one query; steady-state observations produce no transitions.
+        The caller saves a station's rows with ``db.save_alert_states`` once its report
+        went out to *chat*. If delivery fails, the next attempt sees the old state and
+        announces the transition again.
+        """
+        now = now or datetime.now(timezone.utc)
+        batch = list(batch)
+        stored = db.load_alert_states(chat, {d.icao for d in batch})
+        states: dict[tuple[str, str], _State] = {
+            (icao, key): _State(bool(active), bool(announced), _parse_time(cleared))
+            for icao, key, active, announced, cleared in stored
+        }
+
+        transitions: dict[str, list[Transition]] = {}
+        updates: dict[str, list[tuple]] = {}
+        for data in batch:
+            codes = phenomena_codes(data)
+            for compiled in self._compiled:
+                rule = compiled.rule
+                state = states.setdefault((data.icao, rule.key), _State())
+                on = compiled.check(data, codes, state.active)
+                if on == state.active:
+                    continue
+                if on:
+                    # flapping within the cooldown re-arms without a message
+                    announce = state.cleared_at is None or now - state.cleared_at >= rule.cooldown
+                    state.announced = announce
+                else:
+                    announce = state.announced
+                    state.cleared_at = now
+                state.active = on
+                if announce:
+                    transitions.setdefault(data.icao, []).append(Transition(data.icao, rule, on))
+                updates.setdefault(data.icao, []).append(
+                    (
+                        str(chat),
+                        data.icao,
+                        rule.key,
+                        int(on),
+                        int(state.announced),
+                        now.isoformat(timespec="seconds"),
+                        state.cleared_at.isoformat(timespec="seconds") if state.cleared_at else None,
+                    )
+                )
+
+        logger.debug("Alert batch: %d observations, %d state changes", len(batch), sum(map(len, updates.values())))
+        return transitions, updates
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+_DEFAULT_ENGINE: AlertEngine | None = None
+
+
+def default_engine() -> AlertEngine:
+    global _DEFAULT_ENGINE
+    if _DEFAULT_ENGINE is None:
+        _DEFAULT_ENGINE = AlertEngine()
+    return _DEFAULT_ENGINE
@@ -4,7 +4,7 @@ import logging
 import re
 from typing import Tuple
 
-import requests
+from . import breaker
 
 API_URL = "https://aviationweather.gov/api/data/metar"
 
@@ -51,6 +51,9 @@ def fetch_metar_taf(icao: str) -> Tuple[str, str]:
       1. Try AviationWeather experimental API (may change format).
       2. If parsing fails or endpoint unavailable, fall back to classic NOAA
          text files (tgftp.nws.noaa.gov) which reliably host latest METAR & TAF.
+
+    Both hosts go through circuit breakers: while AviationWeather is known to be down
+    the NOAA fallback is used straight away instead of waiting for a timeout.
     """
     icao_upper = icao.upper()
     params = {
@@ -60,7 +63,7 @@ def fetch_metar_taf(icao: str) -> Tuple[str, str]:
     }
     logger.debug("Requesting METAR/TAF for %s", icao)
     try:
-        resp = requests.get(API_URL, params=params, timeout=10)
+        resp = breaker.get_url(API_URL, params=params, timeout=10)
         resp.raise_for_status()
 
         content_lines = [l.strip() for l in resp.text.strip().splitlines() if l.strip()]
@@ -85,14 +88,14 @@ def fetch_metar_taf(icao: str) -> Tuple[str, str]:
     taf_url = NOAA_TAF_URL.format(icao=icao_upper)
 
     logger.debug("Fetching METAR from %s", metar_url)
-    metar_resp = requests.get(metar_url, timeout=10)
+    metar_resp = breaker.get_url(metar_url, timeout=10)
     metar_resp.raise_for_status()
     # NOAA text file has first line date/time, second line METAR
     metar_lines = metar_resp.text.strip().splitlines()
     metar_raw = metar_lines[-1].strip()
 
     logger.debug("Fetching TAF from %s", taf_url)
-    taf_resp = requests.get(taf_url, timeout=10)
+    taf_resp = breaker.get_url(taf_url, timeout=10)
     taf_resp.raise_for_status()
     taf_lines = [l.rstrip() for l in taf_resp.text.strip().splitlines() if l.strip()]
     if taf_lines and _TAF_HEADER_RE.match(taf_lines[0]):
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from . import db
+
+try:
+    import fcntl
+except ImportError:  # Windows – overlapping runs are not serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = Path(__file__).resolve().parent.parent / "archive"
+
+# Segment layout (all integers little-endian):
+#   MAGIC | u32 header length | JSON header | column blocks
+# Each column block is zlib-compressed and addressed by (offset, length) relative to
+# the first byte after the header, so a reader only touches the columns it needs.
+MAGIC = b"WXSEG1\n"
+_HEADER_LEN = struct.Struct("<I")
+_SEGMENT_SUFFIX = ".wxseg"
+_NULL_INT = -(2**31)
+
+# column name -> encoding. "time" = delta-encoded epoch seconds, "int" = int32 with
+# _NULL_INT for NULL, "deci" = like "int" but storing tenths, "text" = int32 lengths
+# followed by concatenated UTF-8.
+COLUMNS = {
+    "metar_time": "time",
+    "taf_issue_time": "time",
+    "created_at": "time",
+    "pressure_hpa": "int",
+    "metar_text": "text",
+    "taf_text": "text",
+    "temperature_c": "deci",
+    "dewpoint_c": "deci",
+    "wind_speed_kt": "int",
+    "wind_gust_kt": "int",
+}
+
+
+def _to_epoch(value: str) -> int:
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:  # sqlite CURRENT_TIMESTAMP is naive UTC
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _encode_column(kind: str, values: list) -> bytes:
+    if kind == "time":
+        deltas = array("q")
+        prev = 0
+        for v in values:
+            deltas.append(v - prev)
+            prev = v
+        raw = deltas.tobytes()
+    elif kind == "int":
+        raw = array("i", (_NULL_INT if v is None else v for v in values)).tobytes()
+    elif kind == "deci":
+        raw = array("i", (_NULL_INT if v is None else round(v * 10) for v in values)).tobytes()
+    else:
+        encoded = [v.encode("utf-8") for v in values]
+        raw = array("i", (len(b) for b in encoded)).tobytes() + b"".join(encoded)
+    return zlib.compress(raw, 9)
+
+
+def _decode_column(kind: str, blob, rows: int) -> list:
+    raw = zlib.decompress(blob)
+    if kind == "time":
+        deltas = array("q")
+        deltas.frombytes(raw)
+        out, acc = [], 0
+        for d in deltas:
+            acc += d
+            out.append(acc)
+        return out
+    if kind == "int":
+        ints = array("i")
+        ints.frombytes(raw)
+        return [None if v == _NULL_INT else v for v in ints]
+    if kind == "deci":
+        ints = array("i")
+        ints.frombytes(raw)
+        return [None if v == _NULL_INT else v / 10 for v in ints]
+    lengths = array("i")
+    lengths.frombytes(raw[: rows * lengths.itemsize])
+    out, pos = [], rows * lengths.itemsize
+    for n in lengths:
+        out.append(raw[pos : pos + n].decode("utf-8"))
+        pos += n
+    return out
+
+
+def _partition_dir(icao: str, day: date) -> Path:
+    return ARCHIVE_DIR / icao.upper() / day.isoformat()
+
+
+def write_segment(icao: str, day: date, rows: list[dict], part: str) -> Path:
+    """Write segment *part* for *icao*/*day*; other parts are never touched.
+
+    Writing the same *part* again replaces it atomically.
+    """
+    rows = sorted(rows, key=lambda r: r["metar_time"])
+    blocks: list[bytes] = []
+    columns: dict[str, dict] = {}
+    offset = 0
+    for name, kind in COLUMNS.items():
+        blob = _encode_column(kind, [r[name] for r in rows])
+        columns[name] = {"type": kind, "offset": offset, "length": len(blob)}
+        blocks.append(blob)
+        offset += len(blob)
+
+    header = json.dumps(
+        {
+            "icao": icao.upper(),
+            "day": day.isoformat(),
+            "rows": len(rows),
+            "min_time": rows[0]["metar_time"],
+            "max_time": rows[-1]["metar_time"],
+            "columns": columns,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    part_dir = _partition_dir(icao, day)
+    part_dir.mkdir(parents=True, exist_ok=True)
+    path = part_dir / f"part-{part}{_SEGMENT_SUFFIX}"
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(_HEADER_LEN.pack(len(header)))
+        fh.write(header)
+        for blob in blocks:
+            fh.write(blob)
+    os.replace(tmp, path)
+    logger.debug("Archived %d rows for %s %s into %s", len(rows), icao, day, path)
+    return path
+
+
+@contextmanager
+def _exclusive() -> Iterator[bool]:
+    """Hold the archive lock; yields ``False`` while another process is archiving."""
+    if fcntl is None:
+        yield True
+        return
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ARCHIVE_DIR / ".lock", "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def archive_closed_windows(now: datetime | None = None) -> int:
+    """Move every closed UTC day from the ``weather`` table into archive segments.
+
+    A day is closed once it is entirely in the past; the current UTC day stays in
+    SQLite only. Must run before :func:`db.cleanup` so rows are archived before they
+    are deleted. Returns the number of archived rows.
+
+    Only one process archives at a time; overlapping runs skip it. Parts are named
+    after the watermark the run started from, so a run that died before advancing it
+    is redone into the same parts instead of duplicating rows.
+    """
+    with _exclusive() as acquired:
+        if not acquired:
+            logger.debug("Another run is archiving – skipped")
+            return 0
+        return _archive_closed_windows(now)
+
+
+def _archive_closed_windows(now: datetime | None) -> int:
+    now = now or datetime.now(timezone.utc)
+    cutoff = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    max_id = db.max_weather_id()
+    watermark = db.get_archive_watermark()
+    last_id, last_cutoff = watermark if watermark else (0, None)
+    part = f"{last_id:010d}-{datetime.fromisoformat(last_cutoff):%Y%m%d}" if last_cutoff else f"{last_id:010d}"
+
+    total = 0
+
+    def _keyed(rows) -> Iterator[tuple[tuple[str, date], dict]]:
+        for icao, metar_time, taf_time, pressure, metar_text, taf_text, created_at, *series in rows:
+            metar_epoch = _to_epoch(metar_time)
+            day = datetime.fromtimestamp(metar_epoch, timezone.utc).date()
+            yield (icao, day), {
+                "metar_time": metar_epoch,
+                "taf_issue_time": _to_epoch(taf_time),
+                "created_at": _to_epoch(created_at),
+                "pressure_hpa": pressure,
+                "metar_text": metar_text,
+                "taf_text": taf_text,
+                **dict(zip(("temperature_c", "dewpoint_c", "wind_speed_kt", "wind_gust_kt"), series)),
+            }
+
+    # Rows arrive ordered by (icao, metar_time) so only one partition is held in memory.
+    for (icao, day), group in groupby(_keyed(db.iter_unarchived_rows(cutoff, max_id, watermark)), key=lambda kv: kv[0]):
+        rows = [row for _, row in group]
+        write_segment(icao, day, rows, part)
+        total += len(rows)
+
+    db.set_archive_watermark(max_id, cutoff)
+    if total:
+        logger.info("Archived %d rows older than %s", total, cutoff.date())
+    return total
+
+
+# ---------------- Reader ------------------
+
+
+def _read_header(mm: mmap.mmap) -> tuple[dict, int]:
+    if mm[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not an archive segment")
+    (header_len,) = _HEADER_LEN.unpack_from(mm, len(MAGIC))
+    start = len(MAGIC) + _HEADER_LEN.size
+    header = json.loads(mm[start : start + header_len])
+    return header, start + header_len
+
+
+def _day_in_range(day: date, start: datetime | None, end: datetime | None) -> bool:
+    day_start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    if start is not None and day_start + timedelta(days=1) <= start:
+        return False
+    if end is not None and day_start >= end:
+        return False
+    return True
+
+
+def _iter_segments(icaos: Iterable[str] | None, start: datetime | None, end: datetime | None) -> Iterator[Path]:
+    if not ARCHIVE_DIR.exists():
+        return
+    if icaos is None:
+        station_dirs = sorted(p for p in ARCHIVE_DIR.iterdir() if p.is_dir())
+    else:
+        station_dirs = [ARCHIVE_DIR / code.upper() for code in icaos]
+    for station_dir in station_dirs:
+        if not station_dir.is_dir():
+            continue
+        for day_dir in sorted(station_dir.iterdir()):
+            try:
+                day = date.fromisoformat(day_dir.name)
+            except ValueError:
+                continue
+            if _day_in_range(day, start, end):
+                yield from sorted(day_dir.glob(f"*{_SEGMENT_SUFFIX}"))
+
+
+def scan(
+    icaos: Iterable[str] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    columns: Iterable[str] | None = None,
+) -> Iterator[dict]:
+    """Yield archived rows as dicts, filtered on station and ``start <= metar_time < end``.
+
+    Filters are pushed down: station and day prune whole directories, the segment
+    header's min/max time prunes files, and only the requested *columns* are
+    decompressed (text columns only for segments with matching rows). Segments are
+    read through ``mmap`` so large archives are never copied into memory wholesale.
+    Time columns are returned as UTC datetimes.
+    """
+    wanted = list(columns) if columns is not None else list(COLUMNS)
+    unknown = set(wanted) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown archive columns: {', '.join(sorted(unknown))}")
+    start_epoch = int(start.timestamp()) if start is not None else None
+    end_epoch = int(end.timestamp()) if end is not None else None
+
+    for path in _iter_segments(icaos, start, end):
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header, data_start = _read_header(mm)
+            if start_epoch is not None and header["max_time"] < start_epoch:
+                continue
+            if end_epoch is not None and header["min_time"] >= end_epoch:
+                continue
+            rows = header["rows"]
+            meta = header["columns"]
+
+            def _column(name: str) -> list:
+                col = meta.get(name)
+                if col is None:  # written by an older layout
+                    return [None] * rows
+                view = memoryview(mm)[data_start + col["offset"] : data_start + col["offset"] + col["length"]]
+                try:
+                    return _decode_column(col["type"], view, rows)
+                finally:
+                    view.release()
+
+            times = _column("metar_time")
+            selected = [
+                i
+                for i, t in enumerate(times)
+                if (start_epoch is None or t >= start_epoch) and (end_epoch is None or t < end_epoch)
+            ]
+            if not selected:
+                continue
+            decoded = {name: (times if name == "metar_time" else _column(name)) for name in wanted}
+
+        for i in selected:
+            row = {"icao": header["icao"]}
+            for name in wanted:
+                value = decoded[name][i]
+                if COLUMNS[name] == "time" and value is not None:
+                    value = datetime.fromtimestamp(value, timezone.utc)
+                row[name] = value
+            yield row
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from . import locales, parser as parser_module, report, taf_summary
+
+_SAMPLES = (
+    "{icao} {t:%d%H}00Z 26035G45KT 0800 +TSRA FG BKN010CB 10/04 Q1015",
+    "{icao} {t:%d%H}30Z 18005KT 9999 FEW040 SCT100 21/12 Q1021 NOSIG",
+    "{icao} {t:%d%H}00Z VRB02KT 0300 FG VV001 02/02 Q1008",
+)
+
+
+def _batch(n: int) -> list[tuple[parser_module.WeatherData, str]]:
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    taf = (
+        f"TAF XXXX {now:%d%H}00Z {now:%d%H}/{now + timedelta(days=1):%d%H} 27008G20KT 9999 BKN020\n"
+        f"TEMPO {now + timedelta(hours=2):%d%H}/{now + timedelta(hours=6):%d%H} -SHRA BKN015CB\n"
+        f"BECMG {now + timedelta(hours=8):%d%H}/{now + timedelta(hours=9):%d%H} VRB03KT CAVOK"
+    )
+    decoded = [
+        parser_module.decode_metar_taf(f"K{i:03d}", sample.format(icao=f"K{i:03d}", t=now), taf)
+        for i, sample in enumerate(_SAMPLES)
+    ]
+    return [(decoded[i % len(decoded)], "Europe/Moscow") for i in range(n)]
+
+
+def _rate(label: str, n: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {n / elapsed:>10.0f} reports/s")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Print reports rendered per second, e.g. ``python -m bot.bench_render --reports 5000``."""
+    p = argparse.ArgumentParser(description="Benchmark report rendering")
+    p.add_argument("--reports", type=int, default=2000, help="Reports rendered per measurement")
+    p.add_argument("--locales", default=",".join(locales.LOCALES), help="Comma-separated locales")
+    args = p.parse_args(argv)
+
+    batch = _batch(args.reports)
+    for code in args.locales.split(","):
+        tafs = [taf_summary.summarize_taf(d.taf_raw, d.taf_issue_time, tz, code) for d, tz in batch]
+
+        def uncached() -> None:
+            for (data, tz), taf in zip(batch, tafs):
+                report._TEMPLATES.clear()  # what every call cost before templates were cached
+                report.generate_report(data, tz, taf, locale=code)
+
+        def cached() -> None:
+            for (data, tz), taf in zip(batch, tafs):
+                report.generate_report(data, tz, taf, locale=code)
+
+        def batched() -> None:
+            report.generate_reports(((d, tz, taf) for (d, tz), taf in zip(batch, tafs)), locale=code)
+
+        def with_taf() -> None:
+            report.generate_reports(
+                ((d, tz, taf_summary.summarize_taf(d.taf_raw, d.taf_issue_time, tz, code)) for d, tz in batch), locale=code
+            )
+
+        print(f"[{code}]")
+        _rate("read + compile per report", args.reports, uncached)
+        _rate("cached template", args.reports, cached)
+        _rate("batch", args.reports, batched)
+        _rate("batch incl. TAF summary", args.reports, with_taf)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+import requests
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+WINDOW_S = 300.0  # rolling window of recorded calls
+MIN_CALLS = 3  # don't judge a host on fewer calls than this
+FAILURE_RATIO = 0.5
+SLOW_CALL_S = 5.0  # slower responses count as failures
+OPEN_BASE_S = 60.0  # first open period, doubled on every failed probe
+OPEN_MAX_S = 900.0
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of making a request while the host's breaker is open."""
+
+
+@dataclass
+class CircuitBreaker:
+    host: str
+    state: str = CLOSED
+    opened_at: float = 0.0
+    open_count: int = 0
+    # (timestamp, ok, latency_s) of recent calls
+    calls: deque[tuple[float, bool, float]] = field(default_factory=deque)
+    _probing: bool = False
+
+    @property
+    def open_for(self) -> float:
+        return min(OPEN_BASE_S * 2 ** max(self.open_count - 1, 0), OPEN_MAX_S)
+
+    def allow(self, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        if self.state == OPEN and now - self.opened_at >= self.open_for:
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True  # let exactly one probe through
+            return True
+        return self.state == CLOSED
+
+    def record(self, ok: bool, latency: float, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        ok = ok and latency < SLOW_CALL_S
+        previous = self.state
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if ok:
+                self.state, self.open_count = CLOSED, 0
+                self.calls.clear()
+            else:
+                self._open(now)
+        else:
+            self.calls.append((now, ok, latency))
+            while self.calls and now - self.calls[0][0] > WINDOW_S:
+                self.calls.popleft()
+            failures = sum(1 for _, good, _ in self.calls if not good)
+            if self.state == CLOSED and len(self.calls) >= MIN_CALLS and failures / len(self.calls) >= FAILURE_RATIO:
+                self._open(now)
+        if self.state != previous:
+            logger.warning("Circuit for %s: %s -> %s", self.host, previous, self.state)
+            _save(self)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.open_count += 1
+
+
+# One breaker per host, shared by every station handled in this process.
+_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def get(host: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(host)
+    if breaker is None:
+        breaker = _BREAKERS[host] = _load(host) or CircuitBreaker(host)
+    return breaker
+
+
+def is_open(url_or_host: str) -> bool:
+    """True while requests to this host would be rejected without trying."""
+    host = urlparse(url_or_host).netloc or url_or_host
+    breaker = get(host)
+    return breaker.state == OPEN and time.time() - breaker.opened_at < breaker.open_for
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """``requests.request`` guarded by the breaker of *url*'s host.
+
+    Connection errors, timeouts, 5xx/429 responses and slow calls count as failures;
+    other 4xx responses are the caller's problem and count as successes.
+    """
+    host = urlparse(url).netloc
+    breaker = get(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {host}, skipping request")
+    started = time.monotonic()
+    try:
+        resp = requests.request(method, url, **kwargs)
+    except requests.RequestException:
+        breaker.record(False, time.monotonic() - started)
+        raise
+    breaker.record(resp.status_code < 500 and resp.status_code != 429, time.monotonic() - started)
+    return resp
+
+
+def get_url(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post_url(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+# ---------------- Persistence ------------------
+
+
+def _load(host: str) -> CircuitBreaker | None:
+    try:
+        row = db.load_breaker(host)
+    except sqlite3.Error:
+        return None  # database not initialised – start closed
+    if row is None:
+        return None
+    state, opened_at, open_count, calls = row
+    return CircuitBreaker(host, state, opened_at, open_count, deque(tuple(c) for c in json.loads(calls)))
+
+
+def _save(breaker: CircuitBreaker) -> None:
+    state = OPEN if breaker.state == HALF_OPEN else breaker.state  # an unfinished probe did not succeed
+    try:
+        db.save_breakers([(breaker.host, state, breaker.opened_at, breaker.open_count, json.dumps(list(breaker.calls)))])
+    except sqlite3.Error as e:
+        logger.debug("Could not persist breaker for %s: %s", breaker.host, e)
+
+
+def save_all() -> None:
+    """Persist every breaker so the next cron run starts with the same knowledge."""
+    for breaker in _BREAKERS.values():
+        _save(breaker)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+
+from .alerts import phenomena_codes
+from .parser import WeatherData
+
+logger = logging.getLogger(__name__)
+
+_CEILING_RE = re.compile(r"\b(?:BKN|OVC|VV)(\d{3})")
+_ISSUE_TIME_RE = re.compile(r"^\d{6}Z$")
+
+
+@dataclass(frozen=True)
+class Significance:
+    """Thresholds deciding whether a new observation is worth sending again."""
+
+    wind_dir_deg: int = 40  # only compared when wind_min_kt is reached
+    wind_min_kt: int = 8
+    wind_speed_kt: int = 5
+    gust_kt: int = 10
+    pressure_hpa: int = 2
+    visibility_bands_m: tuple[int, ...] = (800, 1500, 3000, 5000, 8000)
+    ceiling_bands_ft: tuple[int, ...] = (200, 500, 1000, 1500, 3000)
+    max_silence: timedelta = timedelta(hours=3)
+
+    @classmethod
+    def parse(cls, spec: str) -> Significance:
+        """Build thresholds from ``"wind_speed_kt=7,pressure_hpa=3,max_silence=120"``.
+
+        Band values are ``/``-separated, ``max_silence`` is in minutes.
+        """
+        known = {f.name: f for f in fields(cls)}
+        values: dict = {}
+        for item in filter(None, (p.strip() for p in spec.split(","))):
+            name, _, raw = item.partition("=")
+            if name not in known:
+                raise ValueError(f"Unknown significance threshold: {name}")
+            if name.endswith("_bands_m") or name.endswith("_bands_ft"):
+                values[name] = tuple(sorted(int(v) for v in raw.split("/") if v))
+            elif name == "max_silence":
+                values[name] = timedelta(minutes=float(raw))
+            else:
+                values[name] = int(raw)
+        return cls(**values)
+
+
+def ceiling_ft(metar_raw: str) -> int | None:
+    """Lowest broken/overcast layer or vertical visibility in feet."""
+    heights = [int(h) * 100 for h in _CEILING_RE.findall(metar_raw)]
+    return min(heights) if heights else None
+
+
+def _taf_groups(taf_raw: str) -> list[str]:
+    groups = [line.split() for line in taf_raw.splitlines() if line.strip()]
+    if groups and _ISSUE_TIME_RE.match(groups[0][0]):
+        groups[0] = groups[0][1:]  # a re-issued but unchanged TAF is not news
+    return [" ".join(tokens) for tokens in groups]
+
+
+def snapshot(data: WeatherData) -> dict:
+    """JSON-serialisable summary of what a report showed."""
+    return {
+        "metar_time": data.metar_time.isoformat(timespec="seconds"),
+        "wind_dir_deg": data.wind_dir_deg,
+        "wind_speed_kt": data.wind_speed_kt,
+        "wind_gust_kt": data.wind_gust_kt,
+        "visibility_m": data.visibility_m,
+        "ceiling_ft": ceiling_ft(data.metar_raw),
+        "pressure_hpa": data.pressure_hpa,
+        "phenomena": sorted(phenomena_codes(data)),
+        "taf_groups": _taf_groups(data.taf_raw),
+    }
+
+
+def _band(value: float | None, bands: tuple[int, ...]) -> int | None:
+    if value is None:
+        return None
+    return sum(1 for b in bands if value >= b)
+
+
+def _ceiling_band(value: int | None, sig: Significance) -> int:
+    # no BKN/OVC layer means an unlimited ceiling, i.e. above every band
+    return len(sig.ceiling_bands_ft) if value is None else _band(value, sig.ceiling_bands_ft)
+
+
+def _delta(old, new, threshold: int) -> bool:
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    return abs(new - old) >= threshold
+
+
+def significant_changes(previous: dict | None, current: dict, sent_at: datetime | None, now: datetime, sig: Significance) -> list[str]:
+    """Return the reasons *current* differs meaningfully from the *previous* snapshot.
+
+    An empty list means the update can be suppressed.
+    """
+    if previous is None or sent_at is None:
+        return ["first report"]
+    reasons: list[str] = []
+    if now - sent_at >= sig.max_silence:
+        reasons.append("heartbeat")
+
+    old_speed, new_speed = previous["wind_speed_kt"], current["wind_speed_kt"]
+    if _delta(old_speed, new_speed, sig.wind_speed_kt):
+        reasons.append("wind speed")
+    if _delta(previous["wind_gust_kt"], current["wind_gust_kt"], sig.gust_kt):
+        reasons.append("gusts")
+    old_dir, new_dir = previous["wind_dir_deg"], current["wind_dir_deg"]
+    if (
+        old_dir is not None
+        and new_dir is not None
+        and max(old_speed or 0, new_speed or 0) >= sig.wind_min_kt
+        and min(abs(new_dir - old_dir), 360 - abs(new_dir - old_dir)) >= sig.wind_dir_deg
+    ):
+        reasons.append("wind direction")
+    if _band(previous["visibility_m"], sig.visibility_bands_m) != _band(current["visibility_m"], sig.visibility_bands_m):
+        reasons.append("visibility")
+    if _ceiling_band(previous["ceiling_ft"], sig) != _ceiling_band(current["ceiling_ft"], sig):
+        reasons.append("ceiling")
+    if _delta(previous["pressure_hpa"], current["pressure_hpa"], sig.pressure_hpa):
+        reasons.append("pressure")
+    if previous["phenomena"] != current["phenomena"]:
+        reasons.append("phenomena")
+    if previous["taf_groups"] != current["taf_groups"]:
+        reasons.append("TAF")
+    return reasons
@@ -1,68 +1,209 @@
-import json
 import logging
-from datetime import datetime
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Tuple
+from typing import Iterable, Iterator, TypeVar
 
-import requests
+from . import archive, breaker, db
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-OUTPUT_FILE = Path("pressure_last12h.png")
+OUTPUT_DIR = Path(".")
+QUICKCHART_URL = "https://quickchart.io/chart"
+# Points sent per chart, whatever the time range
+POINT_BUDGET = 200
 
+RANGES = {
+    "12h": timedelta(hours=12),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
 
-def _build_chart_config(times: list[str], pressures: list[int]) -> dict:
+# metric -> (columns, axis title, dataset labels, colours)
+METRICS = {
+    "pressure": (("pressure_hpa",), "hPa", ("Pressure (hPa)",), ("#3e95cd",)),
+    "temperature": (("temperature_c", "dewpoint_c"), "°C", ("Temperature", "Dew point"), ("#e8543e", "#3cba9f")),
+    "wind": (("wind_speed_kt", "wind_gust_kt"), "kt", ("Wind", "Gusts"), ("#3e95cd", "#8e5ea2")),
+}
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    metric: str
+    span: str
+
+    @classmethod
+    def parse(cls, spec: str) -> "ChartSpec":
+        """``"temperature:7d"`` → ChartSpec; the range defaults to 12h."""
+        metric, _, span = spec.strip().partition(":")
+        span = span or "12h"
+        if metric not in METRICS:
+            raise ValueError(f"Unknown chart metric: {metric} (available: {', '.join(METRICS)})")
+        if span not in RANGES:
+            raise ValueError(f"Unknown chart range: {span} (available: {', '.join(RANGES)})")
+        return cls(metric, span)
+
+    @property
+    def duration(self) -> timedelta:
+        return RANGES[self.span]
+
+
+def parse_specs(value: str) -> list[ChartSpec]:
+    """Comma-separated chart specs, e.g. ``pressure:24h,wind:7d``."""
+    return [ChartSpec.parse(v) for v in value.split(",") if v.strip()]
+
+
+# ---------------- Series ------------------
+
+
+def _epoch(value: str) -> float:
+    dt = datetime.fromisoformat(value)
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def iter_series(icao: str, columns: tuple[str, ...], start: datetime, end: datetime) -> Iterator[tuple]:
+    """Stream ``(epoch, *values)`` for *icao*: archived days first, then the live table."""
+    watermark = db.get_archive_watermark()
+    cutoff = datetime.fromisoformat(watermark[1]) if watermark else None
+    if cutoff is not None and start < cutoff:
+        for row in archive.scan([icao], start, min(end, cutoff), ("metar_time", *columns)):
+            yield (row["metar_time"].timestamp(), *(row[c] for c in columns))
+        start = cutoff
+    for metar_time, *values in db.iter_series(icao, columns, start, end):
+        yield (_epoch(metar_time), *values)
+
+
+# ---------------- Downsampling ------------------
+
+
+def _area(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float]) -> float:
+    return abs((a[0] - c[0]) * (b[1] - a[1]) - (a[0] - b[0]) * (c[1] - a[1]))
+
+
+def _average(bucket: list[tuple[float, float, T]]) -> tuple[float, float]:
+    n = len(bucket)
+    return sum(p[0] for p in bucket) / n, sum(p[1] for p in bucket) / n
+
+
+def lttb(points: Iterable[tuple[float, float, T]], start: float, end: float, budget: int) -> list[T]:
+    """Largest-Triangle-Three-Buckets over a stream of ``(x, y, payload)`` points.
+
+    Buckets are fixed slices of ``[start, end)`` rather than of the point count, so
+    the stream is consumed once while holding only two buckets. Returns at most
+    *budget* payloads: the first and last points plus one per non-empty bucket.
+    """
+    if budget < 3:
+        raise ValueError("budget must be at least 3")
+    width = max(end - start, 1e-9) / (budget - 2)
+    selected: list[T] = []
+    anchor: tuple[float, float] | None = None
+    waiting: list[tuple[float, float, T]] = []  # complete bucket, needs the next one's average
+    current: list[tuple[float, float, T]] = []
+    current_idx = -1
+
+    def _pick(bucket: list[tuple[float, float, T]], following: tuple[float, float]) -> None:
+        nonlocal anchor
+        best = max(bucket, key=lambda p: _area(anchor, (p[0], p[1]), following))
+        selected.append(best[2])
+        anchor = (best[0], best[1])
+
+    for point in points:
+        if anchor is None:
+            selected.append(point[2])
+            anchor = (point[0], point[1])
+            continue
+        # late archive parts may step back in time; keep them in the open bucket
+        idx = max(min(int((point[0] - start) / width), budget - 3), current_idx)
+        if idx != current_idx and current:
+            if waiting:
+                _pick(waiting, _average(current))
+            waiting, current = current, []
+        current_idx = idx
+        current.append(point)
+
+    if not current:
+        return selected
+    last = current.pop()
+    if waiting:
+        _pick(waiting, _average(current) if current else (last[0], last[1]))
+    if current:
+        _pick(current, (last[0], last[1]))
+    selected.append(last[2])
+    return selected
+
+
+# ---------------- Rendering ------------------
+
+
+def _build_chart_config(labels: list[str], datasets: list[dict], axis_title: str) -> dict:
     return {
         "type": "line",
-        "data": {
-            "labels": times,
-            "datasets": [
-                {
-                    "label": "Pressure (hPa)",
-                    "data": pressures,
-                    "fill": False,
-                    "borderColor": "#3e95cd",
-                    "tension": 0.1,
-                }
-            ],
-        },
+        "data": {"labels": labels, "datasets": datasets},
         "options": {
-            "plugins": {"legend": {"display": False}},
+            "plugins": {"legend": {"display": len(datasets) > 1}},
             "scales": {
-                "x": {"title": {"display": True, "text": "Time"}},
-                "y": {"title": {"display": True, "text": "hPa"}},
+                "x": {"title": {"display": True, "text": "Time (UTC)"}},
+                "y": {"title": {"display": True, "text": axis_title}},
             },
         },
     }
 
 
-def generate_pressure_chart(rows: Iterable[Tuple[str, int | None]]) -> Path:
-    """Generate pressure chart PNG via QuickChart.io service and save locally."""
+def chart_path(icao: str, spec: ChartSpec) -> Path:
+    return OUTPUT_DIR / f"{icao}_{spec.metric}_{spec.span}.png"
 
-    times_fmt: list[str] = []
-    pressures: list[int] = []
 
-    for iso_time, pressure in rows:
-        if pressure is None:
-            continue
-        try:
-            dt = datetime.fromisoformat(iso_time)
-            times_fmt.append(dt.strftime("%H:%M"))
-            pressures.append(pressure)
-        except Exception:
-            logger.warning("Invalid datetime row: %s", iso_time)
-
-    if not pressures:
-        raise ValueError("No pressure data to plot")
-
-    chart_config = _build_chart_config(times_fmt, pressures)
-    url = "https://quickchart.io/chart"
-    payload = {"c": json.dumps(chart_config)}
-    logger.debug("Requesting QuickChart with payload length %d", len(payload["c"]))
-    resp = requests.get(url, params=payload, timeout=10)
+def generate_chart(icao: str, spec: ChartSpec, now: datetime | None = None, budget: int = POINT_BUDGET) -> Path:
+    """Render *spec* for *icao* via QuickChart.io and save it locally.
+
+    Rows are streamed and reduced to *budget* points by :func:`lttb` on the first
+    column (for wind, the stronger of wind and gust), so the request size does not
+    depend on the range. Raises ``ValueError`` when there is nothing to plot, and
+    :class:`breaker.CircuitOpenError` up front while QuickChart's breaker is open.
+    """
+    if breaker.is_open(QUICKCHART_URL):
+        # don't stream and downsample a series that cannot be rendered anyway
+        raise breaker.CircuitOpenError(f"Circuit open for QuickChart, {icao} {spec.metric} chart skipped")
+    columns, axis_title, labels, colours = METRICS[spec.metric]
+    end = now or datetime.now(timezone.utc)
+    start = end - spec.duration
+
+    def _points() -> Iterator[tuple[float, float, tuple]]:
+        for row in iter_series(icao, columns, start, end):
+            present = [v for v in row[1:] if v is not None]
+            if present:
+                yield row[0], max(present) if spec.metric == "wind" else (row[1] if row[1] is not None else present[0]), row
+
+    rows = lttb(_points(), start.timestamp(), end.timestamp(), budget)
+    if not rows:
+        raise ValueError(f"No {spec.metric} data to plot")
+
+    time_format = "%H:%M" if spec.duration <= timedelta(hours=24) else "%d.%m %H:%M"
+    x_labels = [datetime.fromtimestamp(r[0], timezone.utc).strftime(time_format) for r in rows]
+    datasets = [
+        {
+            "label": label,
+            "data": [r[i + 1] for r in rows],
+            "fill": False,
+            "borderColor": colour,
+            "pointRadius": 0 if len(rows) > 50 else 3,
+            "spanGaps": True,
+            "tension": 0.1,
+        }
+        for i, (label, colour) in enumerate(zip(labels, colours))
+    ]
+    payload = {"chart": _build_chart_config(x_labels, datasets, axis_title), "width": 800, "height": 400, "format": "png"}
+    logger.debug("Requesting QuickChart for %s %s with %d points", icao, spec, len(rows))
+    resp = breaker.post_url(QUICKCHART_URL, json=payload, timeout=10)
     resp.raise_for_status()
 
-    OUTPUT_FILE.write_bytes(resp.content)
-    logger.debug("Pressure chart saved to %s", OUTPUT_FILE)
-    return OUTPUT_FILE
+    path = chart_path(icao, spec)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(resp.content)
+    os.replace(tmp, path)  # another run may be uploading the previous version
+    logger.debug("Chart saved to %s", path)
+    return path
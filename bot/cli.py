@@ -2,76 +2,418 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
 import sys
 import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from . import api, chart, db, parser as parser_module, report as report_module, telegram
-from . import taf_summary
+import requests
+
+from . import alerts, api, archive, breaker, changes, chart, db, parser as parser_module, report as report_module, telegram
+from . import hazards as hazards_module, locales, schedule, singleflight, spatial, stations, taf_summary, verify
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger("bot.cli")
 
+# A METAR older than this is treated like a missing one when a fallback radius is set
+STALE_AFTER = timedelta(hours=2)
+FALLBACK_CANDIDATES = 5
+# Overlapping runs share upstream fetches and rendered charts for this long
+FETCH_TTL_S = 60.0
+CHART_TTL_S = 600.0
+# An unfinished delivery claim older than this belongs to a dead process and is retried
+CLAIM_TTL = timedelta(minutes=10)
 
-def parse_args(argv: list[str] | None = None):
-    p = argparse.ArgumentParser(description="Fetch METAR/TAF and send Telegram report")
-    p.add_argument("--airport", required=True, help="ICAO code of airport")
-    p.add_argument("--timezone", required=True, help="Timezone string, e.g., Europe/Moscow or UTC+2")
+
+def build_parser(**kwargs) -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Fetch METAR/TAF and send Telegram report", **kwargs)
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--airport", help="ICAO code of airport")
+    target.add_argument("--bbox", help="Report every METAR station in lat0,lon0,lat1,lon1")
+    p.add_argument(
+        "--timezone",
+        help="Timezone string, e.g., Europe/Moscow or UTC+2 (default: resolved from the station catalog)",
+    )
     p.add_argument("--token", required=True, help="Telegram bot token")
     p.add_argument("--chat", required=True, help="Telegram chat ID")
     p.add_argument("--add-raw", action="store_true", help="Append raw METAR/TAF to the message")
-    return p.parse_args(argv)
+    p.add_argument(
+        "--charts",
+        type=chart.parse_specs,
+        default=[chart.ChartSpec("pressure", "12h")],
+        help="Charts to attach as metric:range, metrics pressure/temperature/wind, ranges 12h/24h/7d/30d "
+        "(default: pressure:12h)",
+    )
+    p.add_argument(
+        "--digest",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="Collect updates for this long, then send them per chat as albums plus one combined message",
+    )
+    p.add_argument("--locale", choices=sorted(locales.LOCALES), default=locales.DEFAULT_LOCALE, help="Report language")
+    p.add_argument(
+        "--fallback-km",
+        type=float,
+        default=0.0,
+        help="Use the nearest reporting station within this radius when METAR is missing or stale",
+    )
+    p.add_argument("--hazards", action="store_true", help="Add active SIGMET/G-AIRMET hazards to alerts")
+    p.add_argument(
+        "--significance",
+        type=changes.Significance.parse,
+        default=changes.Significance(),
+        help="Change thresholds, e.g. wind_speed_kt=7,pressure_hpa=3,max_silence=180",
+    )
+    p.add_argument("--always-send", action="store_true", help="Send every new observation, even insignificant ones")
+    p.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Only fetch stations whose learned issuance schedule says new data is due (run cron every minute)",
+    )
+    return p
+
+
+def parse_args(argv: list[str] | None = None):
+    return build_parser().parse_args(argv)
+
+
+def _resolve_airports(args) -> list[str]:
+    if args.airport:
+        return [args.airport.upper()]
+    bbox = tuple(float(v) for v in args.bbox.split(","))
+    found = spatial.stations_in_bbox(*bbox)
+    if not found:
+        stations.refresh_catalog(bbox=bbox)
+        found = spatial.stations_in_bbox(*bbox)
+    if not found:
+        raise ValueError(f"No METAR stations in bbox {args.bbox}")
+    return [s.icao for s in found]
+
+
+@dataclass(frozen=True)
+class Fallback:
+    """A substitute station reported instead of the requested one."""
+
+    icao: str
+    alt_icao: str
+    distance_km: float
+
+
+def _is_stale(data: parser_module.WeatherData) -> bool:
+    return datetime.now(timezone.utc) - data.metar_time > STALE_AFTER
+
+
+def _fetch_decoded(icao: str) -> parser_module.WeatherData:
+    metar_raw, taf_raw = singleflight.do("fetch", icao.upper(), FETCH_TTL_S, lambda: list(api.fetch_metar_taf(icao)))
+    return parser_module.decode_metar_taf(icao, metar_raw, taf_raw)
+
+
+def _fallback_candidates(icao: str, radius_km: float) -> list[tuple[float, stations.Station]]:
+    origin = stations.get_station(icao)
+    if origin is None:
+        return []
+    candidates = [c for c in spatial.nearest_stations(origin.lat, origin.lon, FALLBACK_CANDIDATES + 1, radius_km) if c[1].icao != icao]
+    if not candidates:
+        # Catalog may only know the subscribed airport – load its neighbourhood once.
+        pad = radius_km / 111.0
+        stations.refresh_catalog(bbox=(origin.lat - pad, origin.lon - pad, origin.lat + pad, origin.lon + pad))
+        candidates = [c for c in spatial.nearest_stations(origin.lat, origin.lon, FALLBACK_CANDIDATES + 1, radius_km) if c[1].icao != icao]
+    return candidates[:FALLBACK_CANDIDATES]
+
+
+def fetch_observation(icao: str, fallback_km: float = 0.0) -> tuple[parser_module.WeatherData, Fallback | None]:
+    """Fetch and decode *icao*, falling back to the nearest fresh station if needed.
+
+    Returns the decoded data and, when a substitute station was used, what to say about
+    it in the report header.
+    """
+    try:
+        data = _fetch_decoded(icao)
+    except Exception as e:
+        if not fallback_km:
+            raise
+        data = None
+        logger.warning("No METAR for %s (%s), trying stations within %.0f km", icao, e, fallback_km)
+    if data is not None and (not fallback_km or not _is_stale(data)):
+        return data, None
+
+    for distance, alt in _fallback_candidates(icao, fallback_km):
+        try:
+            alt_data = _fetch_decoded(alt.icao)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Fallback %s failed: %s", alt.icao, e)
+            continue
+        if not _is_stale(alt_data):
+            return alt_data, Fallback(icao, alt.icao, distance)
+
+    if data is not None:
+        return data, None  # stale, but better than nothing
+    raise ValueError(f"No METAR for {icao} or any station within {fallback_km:.0f} km")
 
 
 def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "replay":
+        from . import replay
+
+        return replay.main(argv[1:])
+    if argv and argv[0] == "stations":
+        return stations.main(argv[1:])
+    if argv and argv[0] == "worker":
+        from . import worker
+
+        return worker.main(argv[1:])
+    if argv and argv[0] == "serve":
+        from . import server
+
+        return server.main(argv[1:])
+
     args = parse_args(argv)
+    try:
+        return _run(args)
+    finally:
+        # Hand breaker state to the next cron run
+        breaker.save_all()
 
+
+def _run(args) -> int:
     try:
         db.init_db()
+        airports = _resolve_airports(args)
+    except Exception:  # noqa: BLE001
+        _report_error(args)
+        return 1
+    return process_stations(args, airports)
 
-        metar_raw, taf_raw = api.fetch_metar_taf(args.airport)
-        data = parser_module.decode_metar_taf(args.airport, metar_raw, taf_raw)
 
-        if db.already_exists(data):
-            logger.info("No new data – latest METAR/TAF already stored. Exiting.")
-            return 0
+def process_stations(args, airports: list[str], owner: str | None = None) -> int:
+    """Fetch, store, evaluate and deliver *airports*; returns the exit code.
 
-        db.insert_weather(data)
-        db.cleanup()
+    Each new observation is claimed for ``args.chat`` together with its insert, so
+    concurrent cron runs or workers never report the same observation twice. With
+    ``--digest`` reports are queued and a due digest is flushed at the end.
+    """
+    exit_code = _process(args, airports, owner or f"cli:{os.getpid()}")
+    if args.digest:
+        exit_code = _flush_digest(args) or exit_code
+    return exit_code
 
-        # Prepare TAF summary (very naive – could be improved)
-        taf_text = taf_summary.summarize_taf(taf_raw, data.taf_issue_time, args.timezone)
 
-        text_report = report_module.generate_report(data, args.timezone, taf_text, include_raw=args.add_raw)
+def _process(args, airports: list[str], owner: str) -> int:
+    if args.adaptive:
+        airports = schedule.due(airports, args.chat)
+        if not airports:
+            logger.debug("No station due for polling")
+            return 0
 
-        tg = telegram.TelegramClient(args.token, args.chat)
+    station_hazards: dict[str, list[hazards_module.Hazard]] = {}
+    if args.hazards:
+        # One bulk fetch and match for the whole run, not per station
+        try:
+            tracked = [s for s in (stations.get_station(icao) for icao in airports) if s is not None]
+            station_hazards = hazards_module.active_hazards(tracked)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Hazards skipped: %s", e)
 
-        # Pressure chart
-        rows = db.fetch_pressure_last_hours(12, icao=args.airport)
-        chart_sent = False
-        if rows and any(row[1] is not None for row in rows):
-            try:
-                img_path = chart.generate_pressure_chart(rows)
-                tg.send_photo(img_path, caption=text_report if len(text_report) <= 1024 else None)
-                chart_sent = True
-            except ValueError as e:
-                logger.warning("Chart skipped: %s", e)
+    exit_code = 0
+    pending: list[_Pending] = []
+    for icao in airports:
+        item = None
+        try:
+            item = _collect(icao, args, owner)
+        except Exception:  # noqa: BLE001
+            _report_error(args)
+            exit_code = 1
+        finally:
+            if args.adaptive:
+                schedule.record(icao, got_new=item is not None, chat=args.chat)
+        if item is not None:
+            pending.append(item)
+
+    if not pending:
+        return exit_code
 
-        # If chart not sent (e.g., no data), send text separately
-        if not chart_sent:
-            tg.send_message(text_report)
+    try:
+        # Archive closed days before cleanup deletes them from the live table
+        try:
+            archive.archive_closed_windows()
+        except OSError as e:
+            logger.warning("Archiving skipped: %s", e)
+        db.cleanup(verification_days=verify.KEEP_DAYS)
+        singleflight.prune()
+        # State is saved per station once its report is out, so a failed send re-announces
+        transitions, alert_updates = alerts.default_engine().assess((p.data for p in pending), args.chat)
+        last_sent = db.load_snapshots(args.chat, {p.data.icao for p in pending})
+    except Exception:  # noqa: BLE001
+        _report_error(args)
+        return 1
+
+    try:
+        # Each observation is scored once, as it arrives; reports only read the daily sums
+        verify.record(p.data for p in pending)
+        reliability = verify.reliability({p.data.icao for p in pending})
     except Exception as e:  # noqa: BLE001
-        err_text = traceback.format_exc()
-        logger.error("Error occurred: %s", err_text)
+        logger.warning("TAF verification skipped: %s", e)
+        reliability = {}
+
+    for item in pending:
+        station_transitions = transitions.get(item.data.icao, [])
+        snap = changes.snapshot(item.data)
+        if not args.always_send and not station_transitions:
+            previous, sent_at = last_sent.get(item.data.icao, (None, None))
+            reasons = changes.significant_changes(previous, snap, sent_at, datetime.now(timezone.utc), args.significance)
+            if not reasons:
+                logger.info("Update for %s is not significant – not sending.", item.data.icao)
+                _save_alert_state(alert_updates.get(item.data.icao))
+                db.finish_delivery(item.data, args.chat, "skipped")
+                continue
+            logger.debug("Sending %s: %s", item.data.icao, ", ".join(reasons))
         try:
-            tg = telegram.TelegramClient(args.token, args.chat)  # may raise if token invalid
-            tg.send_message(f"❗ Ошибка скрипта:\n{err_text}")
+            status = _deliver(
+                item, args, station_hazards.get(item.airport), station_transitions, reliability.get(item.data.icao)
+            )
+            _save_alert_state(alert_updates.get(item.data.icao))
+            db.save_snapshot(args.chat, item.data.icao, snap, datetime.now(timezone.utc))
+            db.finish_delivery(item.data, args.chat, status)
         except Exception:  # noqa: BLE001
-            logger.exception("Could not send error message to Telegram")
-        return 1
+            _report_error(args)
+            exit_code = 1
+    return exit_code
+
+
+def _save_alert_state(rows: list[tuple] | None) -> None:
+    if rows:
+        db.save_alert_states(rows)
+
+
+def _report_error(args) -> None:
+    err_text = traceback.format_exc()
+    logger.error("Error occurred: %s", err_text)
+    try:
+        tg = telegram.TelegramClient(args.token, args.chat)  # may raise if token invalid
+        tg.send_message(f"❗ Ошибка скрипта:\n{err_text}")
+    except Exception:  # noqa: BLE001
+        logger.exception("Could not send error message to Telegram")
+
+
+@dataclass
+class _Pending:
+    airport: str
+    tz_name: str
+    data: parser_module.WeatherData
+    fallback: Fallback | None
+
 
+def _collect(airport: str, args, owner: str) -> _Pending | None:
+    """Fetch one station, store and claim it; ``None`` when it is known or claimed elsewhere."""
+    tz_name = args.timezone or stations.timezone_for(airport)
+    data, fallback = fetch_observation(airport, args.fallback_km)
+
+    if not db.claim_observation(data, args.chat, owner, CLAIM_TTL):
+        logger.info("No new data for %s – latest METAR/TAF already stored.", data.icao)
+        return None
+    return _Pending(airport, tz_name, data, fallback)
+
+
+def _deliver(
+    item: _Pending,
+    args,
+    station_hazards: list[hazards_module.Hazard] | None,
+    transitions: list[alerts.Transition],
+    reliability: verify.Reliability | None = None,
+) -> str:
+    """Send the report (or queue it for the digest); returns the delivery status."""
+    data = item.data
+
+    # Prepare TAF summary (very naive – could be improved)
+    taf_text = taf_summary.summarize_taf(data.taf_raw, data.taf_issue_time, item.tz_name, args.locale)
+    loc = locales.get_locale(args.locale)
+
+    text_report = report_module.generate_report(
+        data,
+        item.tz_name,
+        taf_text,
+        include_raw=args.add_raw,
+        hazards=station_hazards,
+        alert_messages=[loc.alert(t.rule.key, t.onset, t.message) for t in transitions],
+        locale=args.locale,
+        reliability=reliability,
+    )
+    if item.fallback:
+        note = loc.text["fallback"].format(
+            icao=item.fallback.icao, alt=item.fallback.alt_icao, km=f"{item.fallback.distance_km:.0f}"
+        )
+        text_report = f"{note}\n{text_report}"
+
+    charts = []
+    for spec in args.charts:
+        # Keyed by observation time: every chat reporting this observation reuses one render
+        key = f"{data.icao}_{spec.metric}_{spec.span}_{data.metar_time:%Y%m%d%H%M}"
+        try:
+            path = singleflight.do("chart", key, CHART_TTL_S, lambda: str(chart.generate_chart(data.icao, spec)))
+            charts.append(Path(path))
+        except (ValueError, breaker.CircuitOpenError, requests.RequestException) as e:
+            # QuickChart being down must not cost the chat its report
+            logger.warning("Chart %s:%s skipped: %s", spec.metric, spec.span, e)
+
+    if args.digest:
+        db.enqueue_digest(args.chat, data.icao, text_report, [str(p) for p in charts])
+        return "queued"
+    # Charts without any data are skipped; the text is then sent on its own
+    telegram.TelegramClient(args.token, args.chat).send_report(text_report, charts)
+    return "sent"
+
+
+def _flush_digest(args) -> int:
+    """Send queued reports for the chat once the digest window has passed.
+
+    Each station appears once, with its latest report. Rows leave the queue as soon as
+    their part is sent, so a failure part-way re-sends only what did not go out.
+    """
+    try:
+        rows = db.claim_digest(args.chat, timedelta(seconds=args.digest), CLAIM_TTL)
+    except Exception:  # noqa: BLE001
+        _report_error(args)
+        return 1
+    if not rows:
+        return 0
+    client = telegram.TelegramClient(args.token, args.chat)
+    pending = {row[0] for row in rows}
+    charts_sent = 0
+    try:
+        for ids, text, charts in _digest_parts(rows):
+            client.send_report(text, charts)
+            db.finish_digest(ids)
+            pending.difference_update(ids)
+            charts_sent += len(charts)
+    except Exception:  # noqa: BLE001
+        db.release_digest(sorted(pending))
+        _report_error(args)
+        return 1
+    logger.info("Sent digest of %d reports and %d charts", len(rows), charts_sent)
     return 0
 
 
+def _digest_parts(rows: list[tuple]) -> list[tuple[list[int], str, list[Path]]]:
+    """Pack queued reports into ``(ids, text, charts)`` parts of one message and one album each."""
+    parts: list[tuple[list[int], str, list[Path]]] = []
+    for id_, icao, report, paths, _ in rows:
+        block = f"📍 {icao}\n{report}"
+        charts = [Path(p) for p in paths if Path(p).exists()]
+        if parts:
+            ids, text, part_charts = parts[-1]
+            if (
+                len(text) + 2 + len(block) <= telegram.MAX_MESSAGE
+                and len(part_charts) + len(charts) <= telegram.MAX_MEDIA_GROUP
+            ):
+                parts[-1] = (ids + [id_], f"{text}\n\n{block}", part_charts + charts)
+                continue
+        parts.append(([id_], block, charts))
+    return parts
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import logging
 import sqlite3
 from contextlib import contextmanager
@@ -23,14 +24,147 @@ CREATE TABLE IF NOT EXISTS weather (
     taf_issue_time DATETIME NOT NULL,
     pressure_hpa INTEGER,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    temperature_c REAL,
+    dewpoint_c REAL,
+    wind_speed_kt INTEGER,
+    wind_gust_kt INTEGER,
     UNIQUE (icao, metar_time, taf_issue_time)
 );
+
+CREATE TABLE IF NOT EXISTS archive_watermark (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    last_id INTEGER NOT NULL,
+    last_cutoff DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS replay_checkpoint (
+    source TEXT PRIMARY KEY,
+    records INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS replay_taf (
+    icao TEXT NOT NULL,
+    issued DATETIME NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (icao, issued)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stations (
+    icao TEXT PRIMARY KEY,
+    name TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    elev_m INTEGER,
+    country TEXT,
+    tz TEXT NOT NULL,
+    site_types TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS alert_state (
+    chat TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    announced INTEGER NOT NULL,
+    changed_at DATETIME NOT NULL,
+    cleared_at DATETIME,
+    PRIMARY KEY (chat, icao, rule)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sent_snapshot (
+    chat TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    snapshot TEXT NOT NULL,
+    sent_at DATETIME NOT NULL,
+    PRIMARY KEY (chat, icao)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS poll_state (
+    chat TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    next_due DATETIME NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_fetch_at DATETIME,
+    PRIMARY KEY (chat, icao)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS breaker_state (
+    host TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    opened_at REAL NOT NULL,
+    open_count INTEGER NOT NULL,
+    calls TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS worker (
+    pool TEXT NOT NULL,  -- workers sharing one station set, by default one per chat
+    worker_id TEXT NOT NULL,
+    heartbeat_at DATETIME NOT NULL,
+    PRIMARY KEY (pool, worker_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS station_lease (
+    pool TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (pool, icao)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS delivery (
+    chat TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    metar_time DATETIME NOT NULL,
+    taf_issue_time DATETIME NOT NULL,
+    status TEXT NOT NULL,  -- claimed | queued | sent | skipped
+    claimed_by TEXT NOT NULL,
+    claimed_at DATETIME NOT NULL,
+    PRIMARY KEY (chat, icao, metar_time, taf_issue_time)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS digest_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat TEXT NOT NULL,
+    icao TEXT NOT NULL,
+    text TEXT NOT NULL,
+    charts TEXT NOT NULL,
+    queued_at DATETIME NOT NULL,
+    claimed_at DATETIME  -- set while a run sends the digest
+);
+
+CREATE TABLE IF NOT EXISTS taf_verification (
+    icao TEXT NOT NULL,
+    day DATE NOT NULL,
+    element TEXT NOT NULL,  -- wind | visibility | ceiling | phenomena
+    hits INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (icao, day, element)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS verify_watermark (
+    icao TEXT PRIMARY KEY,
+    metar_time DATETIME NOT NULL
+);
 """
 
+# Columns added after the first release; init_db adds them to older databases.
+_WEATHER_MIGRATIONS = {
+    "temperature_c": "REAL",
+    "dewpoint_c": "REAL",
+    "wind_speed_kt": "INTEGER",
+    "wind_gust_kt": "INTEGER",
+}
+
+# Numeric observation columns that can be charted
+SERIES_COLUMNS = ("pressure_hpa", "temperature_c", "dewpoint_c", "wind_speed_kt", "wind_gust_kt")
+
 
 @contextmanager
 def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=30)
     try:
         yield conn
     finally:
@@ -38,82 +172,562 @@ def _get_conn():
         conn.close()
 
 
+@contextmanager
+def _immediate():
+    """Write transaction taken up front, so concurrent workers serialise on it."""
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
 def init_db() -> None:
     with _get_conn() as conn:
-        conn.execute(SCHEMA)
+        conn.execute("PRAGMA journal_mode=WAL")  # readers don't block the worker holding the write lock
+        if "pool" not in {row[1] for row in conn.execute("PRAGMA table_info(station_lease)")}:
+            # leases predating pools are short-lived; recreate rather than migrate
+            conn.execute("DROP TABLE IF EXISTS station_lease")
+            conn.execute("DROP TABLE IF EXISTS worker")
+        if "chat" not in {row[1] for row in conn.execute("PRAGMA table_info(poll_state)")}:
+            # a missing plan only means "due now", so per-chat plans start afresh
+            conn.execute("DROP TABLE IF EXISTS poll_state")
+        alert_columns = {row[1] for row in conn.execute("PRAGMA table_info(alert_state)")}
+        if alert_columns and "chat" not in alert_columns:
+            conn.execute("ALTER TABLE alert_state RENAME TO alert_state_shared")
+        conn.executescript(SCHEMA)
+        if alert_columns and "chat" not in alert_columns:
+            # state used to be shared by all chats: give each chat that got the station its own copy
+            conn.execute(
+                """
+                INSERT INTO alert_state (chat, icao, rule, active, announced, changed_at, cleared_at)
+                SELECT s.chat, a.icao, a.rule, a.active, a.announced, a.changed_at, a.cleared_at
+                FROM alert_state_shared a JOIN sent_snapshot s ON s.icao = a.icao"""
+            )
+            conn.execute("DROP TABLE alert_state_shared")
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(weather)")}
+        for name, kind in _WEATHER_MIGRATIONS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE weather ADD COLUMN {name} {kind}")
+        if "claimed_at" not in {row[1] for row in conn.execute("PRAGMA table_info(digest_queue)")}:
+            conn.execute("ALTER TABLE digest_queue ADD COLUMN claimed_at DATETIME")
     logger.debug("Database initialised at %s", DB_PATH)
 
 
-def _normalize_text(text: str) -> str:
-    return " ".join(text.split())
+_INSERT_WEATHER = """
+    INSERT OR IGNORE INTO weather (
+        icao, metar_text, metar_time, taf_text, taf_issue_time, pressure_hpa,
+        temperature_c, dewpoint_c, wind_speed_kt, wind_gust_kt
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
 
 
-def already_exists(data: WeatherData) -> bool:
-    metar_norm = _normalize_text(data.metar_raw)
-    taf_norm = _normalize_text(data.taf_raw)
+def _weather_row(data: WeatherData) -> tuple:
+    return (
+        data.icao,
+        data.metar_raw,
+        data.metar_time.isoformat(timespec="seconds"),
+        data.taf_raw,
+        data.taf_issue_time.isoformat(timespec="seconds"),
+        data.pressure_hpa,
+        data.temperature_c,
+        data.dewpoint_c,
+        data.wind_speed_kt,
+        data.wind_gust_kt,
+    )
+
+
+def cleanup(days: int = 2, verification_days: int = 90) -> None:
+    now = datetime.now(timezone.utc)
+    threshold = now - timedelta(days=days)
     with _get_conn() as conn:
         cur = conn.execute(
-            "SELECT 1 FROM weather WHERE icao=? AND metar_time=? AND taf_issue_time=? LIMIT 1",
-            (
-                data.icao,
-                data.metar_time.isoformat(timespec="seconds"),
-                data.taf_issue_time.isoformat(timespec="seconds"),
-            ),
+            "DELETE FROM weather WHERE created_at < ?",
+            (threshold.isoformat(timespec="seconds"),),
         )
-        if cur.fetchone() is not None:
-            return True
+        conn.execute("DELETE FROM delivery WHERE claimed_at < ?", (threshold.isoformat(timespec="seconds"),))
+        conn.execute(
+            "DELETE FROM taf_verification WHERE day < ?",
+            ((now - timedelta(days=verification_days)).date().isoformat(),),
+        )
+    logger.debug("Deleted %d old rows", cur.rowcount if cur else 0)
+
+
+def iter_series(icao: str, columns: tuple[str, ...], start: datetime, end: datetime | None = None):
+    """Stream ``(metar_time, *columns)`` rows of *icao* from *start*, oldest first.
 
+    Rows come straight off the cursor, so a month of SPECIs is never held in memory.
+    """
+    unknown = set(columns) - set(SERIES_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown series columns: {', '.join(sorted(unknown))}")
+    params: tuple = (icao, start.isoformat(timespec="seconds"))
+    end_clause = ""
+    if end is not None:
+        end_clause = "AND metar_time < ?"
+        params += (end.isoformat(timespec="seconds"),)
+    with _get_conn() as conn:
         cur = conn.execute(
-            "SELECT metar_text, taf_text FROM weather WHERE icao=? ORDER BY id DESC LIMIT 1",
-            (data.icao,),
+            f"SELECT metar_time, {', '.join(columns)} FROM weather WHERE icao=? AND metar_time >= ? {end_clause} "
+            "ORDER BY metar_time",
+            params,
         )
-        row: Tuple[str, str] | None = cur.fetchone()
-        if row is None:
-            return False
+        yield from cur
+
 
-        return _normalize_text(row[0]) == metar_norm and _normalize_text(row[1]) == taf_norm
+def get_archive_watermark() -> Tuple[int, str] | None:
+    """Return ``(last_id, last_cutoff)`` of the previous archive run, if any."""
+    with _get_conn() as conn:
+        cur = conn.execute("SELECT last_id, last_cutoff FROM archive_watermark WHERE id = 1")
+        return cur.fetchone()
 
 
-def insert_weather(data: WeatherData) -> None:
+def set_archive_watermark(last_id: int, cutoff: datetime) -> None:
     with _get_conn() as conn:
         conn.execute(
+            "INSERT OR REPLACE INTO archive_watermark (id, last_id, last_cutoff) VALUES (1, ?, ?)",
+            (last_id, cutoff.isoformat(timespec="seconds")),
+        )
+
+
+def max_weather_id() -> int:
+    with _get_conn() as conn:
+        cur = conn.execute("SELECT COALESCE(MAX(id), 0) FROM weather")
+        return cur.fetchone()[0]
+
+
+def iter_unarchived_rows(cutoff: datetime, max_id: int, watermark: Tuple[int, str] | None):
+    """Stream rows older than *cutoff* that previous archive runs have not covered.
+
+    Every run archives ``id <= max_id AND metar_time < cutoff``; since ids only grow and
+    cutoffs only move forward, everything a previous run wrote is exactly
+    ``id <= last_id AND metar_time < last_cutoff``. Late inserts for closed days are
+    therefore picked up by the next run instead of being lost.
+    """
+    last_id, last_cutoff = watermark if watermark else (0, "")
+    with _get_conn() as conn:
+        cur = conn.execute(
+            """
+            SELECT icao, metar_time, taf_issue_time, pressure_hpa, metar_text, taf_text, created_at,
+                   temperature_c, dewpoint_c, wind_speed_kt, wind_gust_kt
+            FROM weather
+            WHERE metar_time < ? AND id <= ? AND NOT (id <= ? AND metar_time < ?)
+            ORDER BY icao, metar_time
+            """,
+            (cutoff.isoformat(timespec="seconds"), max_id, last_id, last_cutoff),
+        )
+        yield from cur
+
+
+def get_replay_checkpoints() -> dict[str, Tuple[int, bool]]:
+    """Return ``{source: (records, done)}`` for every replayed input file."""
+    with _get_conn() as conn:
+        cur = conn.execute("SELECT source, records, done FROM replay_checkpoint")
+        return {source: (records, bool(done)) for source, records, done in cur}
+
+
+def load_replay_tafs() -> list[tuple]:
+    """Return the ``(icao, issued, text)`` TAF history stored with the replay checkpoints."""
+    with _get_conn() as conn:
+        return conn.execute("SELECT icao, issued, text FROM replay_taf").fetchall()
+
+
+def insert_replay_batch(rows: list[WeatherData], checkpoints: dict[str, Tuple[int, bool]], tafs: list[tuple]) -> int:
+    """Insert decoded rows and advance replay checkpoints in one transaction.
+
+    *tafs* replaces the stored ``(icao, issued, text)`` TAF history, so a resumed
+    replay pairs METARs as before without re-reading finished files. Returns the
+    number of rows actually inserted (duplicates are ignored).
+    """
+    with _get_conn() as conn:
+        before = conn.total_changes
+        conn.executemany(_INSERT_WEATHER, [_weather_row(d) for d in rows])
+        inserted = conn.total_changes - before
+        conn.executemany(
             """
-            INSERT OR IGNORE INTO weather (
-                icao, metar_text, metar_time, taf_text, taf_issue_time, pressure_hpa
-            ) VALUES (?, ?, ?, ?, ?, ?)""",
+            INSERT INTO replay_checkpoint (source, records, done, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET
+                records=excluded.records, done=excluded.done, updated_at=excluded.updated_at
+            """,
+            [(source, records, int(done)) for source, (records, done) in checkpoints.items()],
+        )
+        conn.execute("DELETE FROM replay_taf")
+        conn.executemany("INSERT INTO replay_taf (icao, issued, text) VALUES (?, ?, ?)", tafs)
+    return inserted
+
+
+STATION_COLUMNS = ("icao", "name", "lat", "lon", "elev_m", "country", "tz", "site_types")
+
+
+def upsert_stations(rows: list[tuple]) -> None:
+    """Insert or refresh station catalog rows ordered as :data:`STATION_COLUMNS`."""
+    with _get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO stations (icao, name, lat, lon, elev_m, country, tz, site_types)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+    logger.debug("Stored %d stations", len(rows))
+
+
+def load_stations() -> list[tuple]:
+    with _get_conn() as conn:
+        cur = conn.execute(f"SELECT {', '.join(STATION_COLUMNS)} FROM stations")
+        return cur.fetchall()
+
+
+def load_alert_states(chat: str, icaos: set[str]) -> list[tuple]:
+    """Return ``(icao, rule, active, announced, cleared_at)`` rows of *chat* for *icaos*."""
+    if not icaos:
+        return []
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT icao, rule, active, announced, cleared_at FROM alert_state WHERE chat=? AND icao IN ({})".format(
+                ",".join("?" * len(icaos))
+            ),
+            (str(chat), *icaos),
+        )
+        return cur.fetchall()
+
+
+def save_alert_states(rows: list[tuple]) -> None:
+    """Upsert ``(chat, icao, rule, active, announced, changed_at, cleared_at)`` rows."""
+    with _get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO alert_state (chat, icao, rule, active, announced, changed_at, cleared_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+
+
+def load_snapshots(chat: str, icaos: set[str]) -> dict[str, Tuple[dict, datetime]]:
+    """Return ``{icao: (snapshot, sent_at)}`` of the last report sent to *chat*."""
+    if not icaos:
+        return {}
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT icao, snapshot, sent_at FROM sent_snapshot WHERE chat=? AND icao IN ({})".format(
+                ",".join("?" * len(icaos))
+            ),
+            (str(chat), *icaos),
+        )
+        return {icao: (json.loads(snap), datetime.fromisoformat(sent_at)) for icao, snap, sent_at in cur}
+
+
+def save_snapshot(chat: str, icao: str, snapshot: dict, sent_at: datetime) -> None:
+    with _get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO sent_snapshot (chat, icao, snapshot, sent_at) VALUES (?, ?, ?, ?)",
+            (str(chat), icao, json.dumps(snapshot), sent_at.isoformat(timespec="seconds")),
+        )
+
+
+def fetch_issuance_history(icao: str, since: datetime) -> list[Tuple[str, str, str]]:
+    """Return ``(metar_time, taf_issue_time, created_at)`` rows for *icao* since *since*."""
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT metar_time, taf_issue_time, created_at FROM weather WHERE icao=? AND metar_time >= ? ORDER BY metar_time",
+            (icao, since.isoformat(timespec="seconds")),
+        )
+        return cur.fetchall()
+
+
+def fetch_recent_raw(icaos: list[str], since: datetime) -> list[Tuple[str, str, str, str]]:
+    """Return ``(icao, metar_time, metar_text, taf_text)`` rows since *since*, oldest first."""
+    if not icaos:
+        return []
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT icao, metar_time, metar_text, taf_text FROM weather WHERE metar_time >= ? AND icao IN ({}) "
+            "ORDER BY icao, metar_time".format(",".join("?" * len(icaos))),
+            (since.isoformat(timespec="seconds"), *icaos),
+        )
+        return cur.fetchall()
+
+
+def load_poll_states(chat: str, icaos: set[str]) -> dict[str, Tuple[datetime, int]]:
+    """Return ``{icao: (next_due, attempts)}`` of *chat*'s poll plan."""
+    if not icaos:
+        return {}
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT icao, next_due, attempts FROM poll_state WHERE chat=? AND icao IN ({})".format(
+                ",".join("?" * len(icaos))
+            ),
+            (str(chat), *icaos),
+        )
+        return {icao: (datetime.fromisoformat(next_due), attempts) for icao, next_due, attempts in cur}
+
+
+def save_poll_state(chat: str, icao: str, next_due: datetime, attempts: int, fetched_at: datetime) -> None:
+    with _get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO poll_state (chat, icao, next_due, attempts, last_fetch_at) VALUES (?, ?, ?, ?, ?)",
             (
-                data.icao,
-                data.metar_raw,
-                data.metar_time.isoformat(timespec="seconds"),
-                data.taf_raw,
-                data.taf_issue_time.isoformat(timespec="seconds"),
-                data.pressure_hpa,
+                str(chat),
+                icao,
+                next_due.isoformat(timespec="seconds"),
+                attempts,
+                fetched_at.isoformat(timespec="seconds"),
             ),
         )
-    logger.debug("Inserted new weather row for %s", data.icao)
 
 
-def cleanup(days: int = 2) -> None:
-    threshold = datetime.now(timezone.utc) - timedelta(days=days)
+def active_alert_stations(icaos: set[str]) -> set[str]:
+    if not icaos:
+        return set()
     with _get_conn() as conn:
         cur = conn.execute(
-            "DELETE FROM weather WHERE created_at < ?",
-            (threshold.isoformat(timespec="seconds"),),
+            "SELECT DISTINCT icao FROM alert_state WHERE active=1 AND icao IN ({})".format(",".join("?" * len(icaos))),
+            tuple(icaos),
         )
-    logger.debug("Deleted %d old rows", cur.rowcount if cur else 0)
+        return {row[0] for row in cur}
+
+
+def load_breaker(host: str) -> Tuple[str, float, int, str] | None:
+    with _get_conn() as conn:
+        cur = conn.execute("SELECT state, opened_at, open_count, calls FROM breaker_state WHERE host=?", (host,))
+        return cur.fetchone()
+
+
+def save_breakers(rows: list[tuple]) -> None:
+    """Upsert ``(host, state, opened_at, open_count, calls_json)`` rows."""
+    with _get_conn() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO breaker_state (host, state, opened_at, open_count, calls) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+# ---------------- Worker leases and deliveries ------------------
+
+
+def acquire_leases(
+    worker_id: str, pool: str, icaos: list[str], ttl: timedelta, now: datetime | None = None
+) -> list[str]:
+    """Heartbeat *worker_id* in *pool* and return the stations it owns for the next *ttl*.
+
+    Expired workers and leases are dropped, then the worker keeps or takes up to its
+    fair share (stations / live workers of the pool) and hands back any surplus, so
+    the set rebalances as workers join or die. Pools never see each other's workers
+    or leases. Runs as one ``BEGIN IMMEDIATE`` transaction.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_s, until_s = now.isoformat(timespec="seconds"), (now + ttl).isoformat(timespec="seconds")
+    with _immediate() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO worker (pool, worker_id, heartbeat_at) VALUES (?, ?, ?)", (pool, worker_id, now_s)
+        )
+        conn.execute("DELETE FROM worker WHERE heartbeat_at < ?", ((now - ttl).isoformat(timespec="seconds"),))
+        conn.execute("DELETE FROM station_lease WHERE expires_at < ?", (now_s,))
+        live = conn.execute("SELECT COUNT(*) FROM worker WHERE pool=?", (pool,)).fetchone()[0]
+        share = -(-len(icaos) // max(live, 1))
+
+        leases = dict(conn.execute("SELECT icao, worker_id FROM station_lease WHERE pool=?", (pool,)).fetchall())
+        wanted = set(icaos)
+        mine = sorted(icao for icao, owner in leases.items() if owner == worker_id and icao in wanted)
+        stale = [icao for icao, owner in leases.items() if owner == worker_id and icao not in wanted]
+        surplus = mine[share:] + stale
+        mine = mine[:share]
+        if surplus:
+            conn.executemany(
+                "DELETE FROM station_lease WHERE pool=? AND icao=? AND worker_id=?",
+                [(pool, i, worker_id) for i in surplus],
+            )
+        free = [icao for icao in icaos if icao not in leases]
+        taken = free[: max(share - len(mine), 0)]
+        conn.executemany(
+            "INSERT OR REPLACE INTO station_lease (pool, icao, worker_id, expires_at) VALUES (?, ?, ?, ?)",
+            [(pool, icao, worker_id, until_s) for icao in mine + taken],
+        )
+    return sorted(mine + taken)
+
+
+def renew_leases(worker_id: str, pool: str, ttl: timedelta, now: datetime | None = None) -> int:
+    """Extend the worker's heartbeat and leases; returns how many leases it still holds."""
+    now = now or datetime.now(timezone.utc)
+    until_s = (now + ttl).isoformat(timespec="seconds")
+    with _immediate() as conn:
+        conn.execute(
+            "UPDATE worker SET heartbeat_at=? WHERE pool=? AND worker_id=?",
+            (now.isoformat(timespec="seconds"), pool, worker_id),
+        )
+        cur = conn.execute("UPDATE station_lease SET expires_at=? WHERE pool=? AND worker_id=?", (until_s, pool, worker_id))
+        return cur.rowcount
+
+
+def release_leases(worker_id: str, pool: str) -> None:
+    with _immediate() as conn:
+        conn.execute("DELETE FROM station_lease WHERE pool=? AND worker_id=?", (pool, worker_id))
+        conn.execute("DELETE FROM worker WHERE pool=? AND worker_id=?", (pool, worker_id))
+
+
+def _delivery_key(chat: str, data: WeatherData) -> tuple:
+    return (
+        str(chat),
+        data.icao,
+        data.metar_time.isoformat(timespec="seconds"),
+        data.taf_issue_time.isoformat(timespec="seconds"),
+    )
+
+
+def claim_observation(data: WeatherData, chat: str, owner: str, ttl: timedelta, now: datetime | None = None) -> bool:
+    """Store *data* (if not stored yet) and claim its delivery to *chat* in one transaction.
+
+    Whether the observation is new is decided per chat by the ``delivery`` row alone,
+    so every chat gets each observation once, whoever stored it. ``True`` means the
+    caller must process it and then call :func:`finish_delivery`: either *chat* has
+    not seen it, or an earlier claim was left unfinished for longer than *ttl* (its
+    owner died). ``False`` means someone else has it or it is done.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_s = now.isoformat(timespec="seconds")
+    key = _delivery_key(chat, data)
+    with _immediate() as conn:
+        row = conn.execute(
+            "SELECT status, claimed_at FROM delivery WHERE chat=? AND icao=? AND metar_time=? AND taf_issue_time=?",
+            key,
+        ).fetchone()
+        if row is not None:
+            status, claimed_at = row
+            if status != "claimed" or claimed_at >= (now - ttl).isoformat(timespec="seconds"):
+                return False
+            conn.execute(
+                "UPDATE delivery SET claimed_by=?, claimed_at=? WHERE chat=? AND icao=? AND metar_time=? AND taf_issue_time=?",
+                (owner, now_s, *key),
+            )
+            logger.info("Taking over unfinished delivery of %s from a dead worker", data.icao)
+            return True
+        conn.execute(_INSERT_WEATHER, _weather_row(data))  # another chat may have stored it already
+        conn.execute(
+            "INSERT INTO delivery (chat, icao, metar_time, taf_issue_time, status, claimed_by, claimed_at) "
+            "VALUES (?, ?, ?, ?, 'claimed', ?, ?)",
+            (*key, owner, now_s),
+        )
+    return True
+
+
+def finish_delivery(data: WeatherData, chat: str, status: str) -> None:
+    """Mark a claimed delivery as ``sent``, ``queued`` (for a digest) or ``skipped``."""
+    with _get_conn() as conn:
+        conn.execute(
+            "UPDATE delivery SET status=? WHERE chat=? AND icao=? AND metar_time=? AND taf_issue_time=?",
+            (status, *_delivery_key(chat, data)),
+        )
+
 
+def enqueue_digest(chat: str, icao: str, text: str, charts: list[str], queued_at: datetime | None = None) -> None:
+    queued_at = queued_at or datetime.now(timezone.utc)
+    with _get_conn() as conn:
+        conn.execute(
+            "INSERT INTO digest_queue (chat, icao, text, charts, queued_at) VALUES (?, ?, ?, ?, ?)",
+            (str(chat), icao, text, json.dumps(charts), queued_at.isoformat(timespec="seconds")),
+        )
+
+
+def claim_digest(
+    chat: str, window: timedelta, ttl: timedelta, now: datetime | None = None
+) -> list[Tuple[int, str, str, list[str], str]]:
+    """Claim ``(id, icao, text, charts, queued_at)`` rows once the oldest is *window* old.
+
+    Only each station's latest report is returned; the ones it superseded are dropped.
+    Claiming is atomic and nothing is returned while another run holds a claim younger
+    than *ttl*, so of several runs or workers exactly one sends the digest. The caller
+    removes rows with :func:`finish_digest` as their part goes out and hands the rest
+    back with :func:`release_digest` if sending fails.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_s = now.isoformat(timespec="seconds")
+    with _immediate() as conn:
+        rows = conn.execute(
+            "SELECT id, icao, text, charts, queued_at, claimed_at FROM digest_queue WHERE chat=? ORDER BY id",
+            (str(chat),),
+        ).fetchall()
+        if not rows or min(r[4] for r in rows) > (now - window).isoformat(timespec="seconds"):
+            return []
+        if any(r[5] and r[5] > (now - ttl).isoformat(timespec="seconds") for r in rows):
+            return []
+        latest = {r[1]: r for r in rows}
+        kept = sorted(latest.values())
+        superseded = [(r[0],) for r in rows if latest[r[1]] is not r]
+        conn.executemany("DELETE FROM digest_queue WHERE id=?", superseded)
+        conn.executemany("UPDATE digest_queue SET claimed_at=? WHERE id=?", [(now_s, r[0]) for r in kept])
+    return [(id_, icao, text, json.loads(charts), queued_at) for id_, icao, text, charts, queued_at, _ in kept]
+
+
+def finish_digest(ids: list[int]) -> None:
+    """Remove claimed digest rows whose part was sent."""
+    with _get_conn() as conn:
+        conn.executemany("DELETE FROM digest_queue WHERE id=?", [(i,) for i in ids])
+
+
+def release_digest(ids: list[int]) -> None:
+    """Return claimed digest rows to the queue for the next run."""
+    with _get_conn() as conn:
+        conn.executemany("UPDATE digest_queue SET claimed_at=NULL WHERE id=?", [(i,) for i in ids])
+
+
+def load_verify_watermarks(icaos: set[str]) -> dict[str, str]:
+    """Return ``{icao: metar_time}`` of the last observation folded into the TAF statistics."""
+    if not icaos:
+        return {}
+    with _get_conn() as conn:
+        cur = conn.execute(
+            "SELECT icao, metar_time FROM verify_watermark WHERE icao IN ({})".format(",".join("?" * len(icaos))),
+            tuple(icaos),
+        )
+        return dict(cur.fetchall())
+
+
+def save_verification(rows: list[tuple], watermarks: dict[str, Tuple[str, str]]) -> None:
+    """Add ``(icao, day, element, hits, total)`` counts and advance the per-station watermarks.
+
+    *watermarks* maps icao to the ``(first, last)`` METAR times the counts cover. A
+    station whose stored watermark already reached *first* was scored by a concurrent
+    run meanwhile; its counts are dropped so nothing is counted twice.
+    """
+    if not watermarks:
+        return
+    with _immediate() as conn:
+        stored = dict(
+            conn.execute(
+                "SELECT icao, metar_time FROM verify_watermark WHERE icao IN ({})".format(
+                    ",".join("?" * len(watermarks))
+                ),
+                tuple(watermarks),
+            ).fetchall()
+        )
+        fresh = {icao for icao, (first, _) in watermarks.items() if stored.get(icao, "") < first}
+        conn.executemany(
+            """
+            INSERT INTO taf_verification (icao, day, element, hits, total) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (icao, day, element) DO UPDATE SET
+                hits = hits + excluded.hits, total = total + excluded.total""",
+            [row for row in rows if row[0] in fresh],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO verify_watermark (icao, metar_time) VALUES (?, ?)",
+            [(icao, watermarks[icao][1]) for icao in fresh],
+        )
 
-def fetch_pressure_last_hours(hours: int = 12, icao: str | None = None):
-    from datetime import timedelta
 
-    start = datetime.now(timezone.utc) - timedelta(hours=hours)
+def load_verification(icaos: set[str], since_day: str) -> list[Tuple[str, str, int, int]]:
+    """Return ``(icao, element, hits, total)`` summed over the daily buckets from *since_day*."""
+    if not icaos:
+        return []
     with _get_conn() as conn:
         cur = conn.execute(
             """
-            SELECT metar_time, pressure_hpa FROM weather
-            WHERE metar_time >= ? {icao_clause}
-            ORDER BY metar_time ASC
-            """.format(icao_clause="AND icao=?" if icao else ""),
-            (start.isoformat(timespec="seconds"), icao) if icao else (start.isoformat(timespec="seconds"),),
+            SELECT icao, element, SUM(hits), SUM(total) FROM taf_verification
+            WHERE icao IN ({}) AND day >= ? GROUP BY icao, element""".format(",".join("?" * len(icaos))),
+            (*icaos, since_day),
         )
         return cur.fetchall()
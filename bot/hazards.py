@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable
+
+from . import breaker
+from .locales import Locale, get_locale
+from .spatial import GridIndex
+from .stations import Station
+
+logger = logging.getLogger(__name__)
+
+HAZARD_URLS = {
+    "isigmet": "https://aviationweather.gov/api/data/isigmet",
+    "airsigmet": "https://aviationweather.gov/api/data/airsigmet",
+    "gairmet": "https://aviationweather.gov/api/data/gairmet",
+}
+
+_SOURCE_LABEL = {"isigmet": "SIGMET", "airsigmet": "SIGMET", "gairmet": "G-AIRMET"}
+
+
+@dataclass(frozen=True)
+class Hazard:
+    source: str
+    hazard: str
+    valid_from: datetime | None
+    valid_to: datetime | None
+    # (lat, lon) vertices; longitudes are unwrapped so neighbours differ by < 180°
+    polygon: tuple[tuple[float, float], ...]
+    raw: str | None = None
+
+    @property
+    def bbox(self) -> tuple[float, float, float, float]:
+        lats = [p[0] for p in self.polygon]
+        lons = [p[1] for p in self.polygon]
+        return min(lats), min(lons), max(lats), max(lons)
+
+    def is_active(self, at: datetime) -> bool:
+        if self.valid_from is not None and at < self.valid_from:
+            return False
+        if self.valid_to is not None and at >= self.valid_to:
+            return False
+        return True
+
+    def describe(self, loc: Locale | None = None) -> str:
+        text = (loc or get_locale(None)).hazards.get(self.hazard.upper(), self.hazard.lower())
+        return f"{_SOURCE_LABEL.get(self.source, self.source.upper())}: {text}"
+
+
+def _to_datetime(value) -> datetime | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _unwrap(coords: Iterable[dict]) -> tuple[tuple[float, float], ...]:
+    points: list[tuple[float, float]] = []
+    for c in coords:
+        lat, lon = float(c["lat"]), float(c["lon"])
+        if points:
+            prev = points[-1][1]
+            while lon - prev > 180:
+                lon -= 360
+            while prev - lon > 180:
+                lon += 360
+        points.append((lat, lon))
+    return tuple(points)
+
+
+def _parse(source: str, item: dict) -> Hazard | None:
+    if (item.get("geom") or item.get("geometryType") or "AREA").upper() != "AREA":
+        return None  # LINE hazards have no inside
+    polygon = _unwrap(item.get("coords") or [])
+    if len(polygon) < 3:
+        return None
+    if source == "gairmet":
+        valid_from = _to_datetime(item.get("validTime")) or _to_datetime(item.get("issueTime"))
+        valid_to = _to_datetime(item.get("expireTime"))
+    else:
+        valid_from = _to_datetime(item.get("validTimeFrom"))
+        valid_to = _to_datetime(item.get("validTimeTo"))
+    return Hazard(
+        source=source,
+        hazard=str(item.get("hazard") or "UNK"),
+        valid_from=valid_from,
+        valid_to=valid_to,
+        polygon=polygon,
+        raw=item.get("rawSigmet") or item.get("rawAirSigmet"),
+    )
+
+
+def _parse_items(source: str, items: Iterable[dict]) -> list[Hazard]:
+    hazards: list[Hazard] = []
+    skipped = 0
+    for item in items:
+        try:
+            hazard = _parse(source, item)
+        except Exception as e:  # noqa: BLE001
+            skipped += 1
+            logger.debug("Malformed %s item skipped: %s", source, e)
+            continue
+        if hazard is not None:
+            hazards.append(hazard)
+    if skipped:
+        logger.warning("Skipped %d malformed %s items", skipped, source)
+    return hazards
+
+
+def fetch_hazards(region: tuple[float, float, float, float] | None = None, sources: Iterable[str] = tuple(HAZARD_URLS)) -> list[Hazard]:
+    """Fetch all SIGMET/G-AIRMET polygons in one request per product.
+
+    *region* ``(lat0, lon0, lat1, lon1)`` drops polygons whose bounding box does not
+    intersect it. A failing product is logged and skipped so one outage does not hide
+    the others, and a malformed item only costs that item.
+    """
+    hazards: list[Hazard] = []
+    for source in sources:
+        try:
+            resp = breaker.get_url(HAZARD_URLS[source], params={"format": "json"}, timeout=10)
+            resp.raise_for_status()
+            items = resp.json() if resp.text.strip() else []
+            hazards.extend(_parse_items(source, items))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Could not fetch %s: %s", source, e)
+            continue
+
+    if region is not None:
+        hazards = [h for h in hazards if _bbox_intersects(h.bbox, region)]
+    logger.debug("Fetched %d hazard polygons", len(hazards))
+    return hazards
+
+
+def _bbox_intersects(bbox: tuple[float, float, float, float], region: tuple[float, float, float, float]) -> bool:
+    r_lat0, r_lat1 = sorted((region[0], region[2]))
+    if bbox[0] > r_lat1 or bbox[2] < r_lat0:
+        return False
+    r_lon0, r_lon1 = region[1], region[3]
+    if r_lon1 < r_lon0:  # region crosses the antimeridian
+        r_lon1 += 360
+    return any(bbox[1] + shift <= r_lon1 and bbox[3] + shift >= r_lon0 for shift in (-360, 0, 360))
+
+
+def point_in_polygon(lat: float, lon: float, polygon: tuple[tuple[float, float], ...]) -> bool:
+    """Ray casting in lat/lon space (polygons are small enough for planar geometry)."""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            cross_lon = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < cross_lon:
+                inside = not inside
+        j = i
+    return inside
+
+
+def match_airports(hazards: Iterable[Hazard], airports: Iterable[Station], at: datetime | None = None) -> dict[str, list[Hazard]]:
+    """Map ICAO -> active hazards whose polygon contains the airport.
+
+    Airports are put in a grid index once; each polygon only runs point-in-polygon for
+    the airports inside its bounding box, so cost grows with actual overlaps rather
+    than with polygons × airports.
+    """
+    at = at or datetime.now(timezone.utc)
+    index = GridIndex(airports, key=lambda s: (s.lat, s.lon))
+    matches: dict[str, list[Hazard]] = defaultdict(list)
+    for hazard in hazards:
+        if not hazard.is_active(at):
+            continue
+        lat0, lon0, lat1, lon1 = hazard.bbox
+        if lon1 - lon0 >= 360:
+            candidates = index.bbox(lat0, -180, lat1, 180)
+        else:
+            # Unwrapped longitudes may leave [-180, 180]; fold them back for the grid query.
+            w0, w1 = ((lon0 + 180) % 360) - 180, ((lon1 + 180) % 360) - 180
+            candidates = index.bbox(lat0, w0, lat1, w1)
+        for station in candidates:
+            lon = station.lon
+            while lon < lon0:
+                lon += 360
+            while lon > lon1:
+                lon -= 360
+            if point_in_polygon(station.lat, lon, hazard.polygon):
+                matches[station.icao].append(hazard)
+    return dict(matches)
+
+
+def active_hazards(airports: Iterable[Station], region: tuple[float, float, float, float] | None = None) -> dict[str, list[Hazard]]:
+    """Fetch current hazards once and match them against all *airports*."""
+    airports = list(airports)
+    if region is None and airports:
+        region = (
+            min(s.lat for s in airports),
+            min(s.lon for s in airports),
+            max(s.lat for s in airports),
+            max(s.lon for s in airports),
+        )
+    return match_airports(fetch_hazards(region), airports)
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Mapping
+
+DEFAULT_LOCALE = "ru"
+
+
+@dataclass(frozen=True)
+class Locale:
+    """Every user-visible string of a language, shared by all reports rendered in it.
+
+    *text* entries are ``str.format`` patterns; the code tables map METAR/TAF groups
+    to descriptions.
+    """
+
+    code: str
+    text: Mapping[str, str]
+    cover: Mapping[str, str]  # METAR sky cover
+    weather: Mapping[str, str]  # TAF weather groups
+    cloud: Mapping[str, str]  # TAF cloud groups
+    alerts: Mapping[str, tuple[str, str]] = field(default_factory=dict)  # rule key -> (onset, clear)
+    hazards: Mapping[str, str] = field(default_factory=dict)  # SIGMET/AIRMET hazard -> description
+
+    def alert(self, key: str, onset: bool, default: str) -> str:
+        messages = self.alerts.get(key)
+        return messages[0 if onset else 1] if messages else default
+
+
+RU = Locale(
+    code="ru",
+    text={
+        "n_a": "N/A",
+        "cavok": "CAVOK",
+        "gusts": ", порывы {kmh} км/ч",
+        "height": "{desc} {m} м",
+        "sky_cb": " (кучево-дождевые облака)",
+        "sky_tcu": " (башенные кучевые облака)",
+        "wind": "ветер {dir}° {kmh} км/ч{gust}",
+        "wind_vrb": "переменный ветер {kmh} км/ч{gust}",
+        "cb": "кучево-дождевые облака",
+        "km": "{v} км",
+        "m": "{v} м",
+        "vis_unlimited": "10+ км",
+        "visibility": "видимость {sign}{v}",
+        "vis_more": "более {v}",
+        "vis_upto": "до {v}",
+        "cavok_long": "CAVOK (видимость >10 км, нет значимой облачности)",
+        "change": "изменение погоды",
+        "tempo_change": "временное изменение погоды",
+        "vis_change": "изменение видимости: {vis}",
+        "prob": "Вероятность {prob}% {range}",
+        "range": "({start}-{end}) ",
+        "becmg": "В интервале {start}-{end} ожидается изменение к: {cond}.",
+        "becmg_vis": "В интервале {start}-{end} ожидается изменение видимости: {vis}.",
+        "tempo": "Временами ",
+        "base": "Основной прогноз: ",
+        "fallback": "⚠️ Нет свежих данных {icao}, показана станция {alt} ({km} км)",
+        "reliability": "📊 Оправдываемость TAF за {days} дн.: {items}",
+        "rel_item": "{name} {pct}%",
+        "rel_wind": "ветер",
+        "rel_visibility": "видимость",
+        "rel_ceiling": "облачность",
+        "rel_phenomena": "явления",
+    },
+    cover={
+        "SKC": "ясно",
+        "CLR": "ясно",
+        "FEW": "небольшая облачность",
+        "SCT": "рассеянная облачность",
+        "BKN": "облачно",
+        "OVC": "сплошная облачность",
+    },
+    weather={
+        # Drizzle
+        "-DZ": "слабая морось 🌧",
+        "DZ": "морось 🌧",
+        "+DZ": "сильная морось 🌧🌧",
+        # Rain
+        "-RA": "слабый дождь 🌧",
+        "RA": "дождь 🌧🌧",
+        "+RA": "сильный дождь 🌧🌧🌧",
+        # Shower rain
+        "-SHRA": "слабый ливневой дождь 🌦",
+        "SHRA": "ливневой дождь 🌦🌦",
+        "+SHRA": "сильный ливневой дождь 🌦🌦🌦",
+        # Thunderstorm
+        "TS": "гроза ⚡️",
+        "-TSRA": "слабая гроза с дождём ⛈️",
+        "TSRA": "гроза с дождём ⛈️",
+        "+TSRA": "сильная гроза с дождём ⛈️",
+        # Other phenomena
+        "BR": "дымка 🌫️",
+        "FG": "туман 😶‍🌫️",
+        "HZ": "мгла 🌫️",
+        "DU": "пыль 💨",
+        "SA": "песок 💨",
+        "BLDU": "пыльная позёмка 💨",
+        "BLSA": "песчаная позёмка 💨",
+        "BLSN": "метель ❄️💨",
+        "-FZDZ": "слабая ледяная морось 🌧❄️",
+        "FZDZ": "ледяная морось 🌧❄️",
+        "+FZDZ": "сильная ледяная морось 🌧❄️❄️",
+        "-FZRA": "слабый ледяной дождь 🌧❄️",
+        "FZRA": "ледяной дождь 🌧❄️",
+        "+FZRA": "сильный ледяной дождь 🌧❄️❄️",
+        "-RASN": "слабый дождь со снегом 🌧❄️",
+        "RASN": "дождь со снегом 🌧❄️",
+        "+RASN": "сильный дождь со снегом 🌧❄️❄️",
+        "-SNRA": "слабый дождь со снегом 🌧❄️",
+        "SNRA": "дождь со снегом 🌧❄️",
+        "+SNRA": "сильный дождь со снегом 🌧❄️❄️",
+        "-SN": "слабый снег ❄️",
+        "SN": "снег ❄️",
+        "+SN": "сильный снег ❄️❄️❄️",
+        "-SHSN": "слабый ливневой снег ❄️",
+        "SHSN": "ливневой снег ❄️❄️❄️",
+        "+SHSN": "сильный ливневой снег ❄️❄️❄️❄️",
+        "-PL": "слабая ледяная крупа 🧊",
+        "PL": "ледяная крупа 🧊",
+        "+PL": "сильная ледяная крупа 🧊🧊",
+        "-SG": "слабые снежные зёрна ❄️",
+        "SG": "снежные зёрна ❄️",
+        "+SG": "сильные снежные зёрна ❄️❄️",
+        "-GR": "слабый град 🌨️",
+        "GR": "град 🌨️",
+        "+GR": "сильный град 🌨️🌨️",
+        "-GS": "слабый мелкий град 🌨️",
+        "GS": "мелкий град 🌨️",
+        "+GS": "сильный мелкий град 🌨️🌨️",
+    },
+    cloud={
+        "CLR": "безоблачно ○",
+        "SKC": "безоблачно ○",
+        "NSC": "нет значимой облачности",
+        "FEW": "небольшая облачность ◔",
+        "SCT": "рассеянная облачность ◑",
+        "BKN": "облачность 5-7 октантов ◕",
+        "OVC": "сплошная облачность ●",
+    },
+    hazards={
+        "TS": "⛈️ гроза",
+        "CONVECTIVE": "⛈️ гроза",
+        "CONV": "⛈️ гроза",
+        "TURB": "🌀 турбулентность",
+        "TURB-HI": "🌀 турбулентность",
+        "TURB-LO": "🌀 турбулентность",
+        "ICE": "🧊 обледенение",
+        "IFR": "☁️ условия IFR",
+        "MT_OBSC": "⛰️ горы закрыты облаками",
+        "MTN OBSCN": "⛰️ горы закрыты облаками",
+        "MTN_OBS": "⛰️ горы закрыты облаками",
+        "VA": "🌋 вулканический пепел",
+        "ASH": "🌋 вулканический пепел",
+        "TC": "🌀 тропический циклон",
+        "LLWS": "💨 сдвиг ветра",
+        "SFC_WIND": "💨 сильный приземный ветер",
+        "DS": "💨 пыльная буря",
+        "SS": "💨 песчаная буря",
+        "RDOACT CLD": "☢️ радиоактивное облако",
+    },
+)
+
+EN = Locale(
+    code="en",
+    text={
+        "n_a": "N/A",
+        "cavok": "CAVOK",
+        "gusts": ", gusts {kmh} km/h",
+        "height": "{desc} {m} m",
+        "sky_cb": " (cumulonimbus)",
+        "sky_tcu": " (towering cumulus)",
+        "wind": "wind {dir}° {kmh} km/h{gust}",
+        "wind_vrb": "variable wind {kmh} km/h{gust}",
+        "cb": "cumulonimbus",
+        "km": "{v} km",
+        "m": "{v} m",
+        "vis_unlimited": "10+ km",
+        "visibility": "visibility {sign}{v}",
+        "vis_more": "over {v}",
+        "vis_upto": "down to {v}",
+        "cavok_long": "CAVOK (visibility >10 km, no significant cloud)",
+        "change": "weather change",
+        "tempo_change": "temporary weather change",
+        "vis_change": "visibility change: {vis}",
+        "prob": "Probability {prob}% {range}",
+        "range": "({start}-{end}) ",
+        "becmg": "Between {start} and {end} becoming: {cond}.",
+        "becmg_vis": "Between {start} and {end} visibility becoming: {vis}.",
+        "tempo": "Temporarily ",
+        "base": "Main forecast: ",
+        "fallback": "⚠️ No recent data for {icao}, showing station {alt} ({km} km)",
+        "reliability": "📊 TAF accuracy over {days} days: {items}",
+        "rel_item": "{name} {pct}%",
+        "rel_wind": "wind",
+        "rel_visibility": "visibility",
+        "rel_ceiling": "ceiling",
+        "rel_phenomena": "weather",
+    },
+    cover={
+        "SKC": "clear",
+        "CLR": "clear",
+        "FEW": "few clouds",
+        "SCT": "scattered clouds",
+        "BKN": "broken clouds",
+        "OVC": "overcast",
+    },
+    weather={
+        "-DZ": "light drizzle 🌧",
+        "DZ": "drizzle 🌧",
+        "+DZ": "heavy drizzle 🌧🌧",
+        "-RA": "light rain 🌧",
+        "RA": "rain 🌧🌧",
+        "+RA": "heavy rain 🌧🌧🌧",
+        "-SHRA": "light rain showers 🌦",
+        "SHRA": "rain showers 🌦🌦",
+        "+SHRA": "heavy rain showers 🌦🌦🌦",
+        "TS": "thunderstorm ⚡️",
+        "-TSRA": "light thunderstorm with rain ⛈️",
+        "TSRA": "thunderstorm with rain ⛈️",
+        "+TSRA": "heavy thunderstorm with rain ⛈️",
+        "BR": "mist 🌫️",
+        "FG": "fog 😶‍🌫️",
+        "HZ": "haze 🌫️",
+        "DU": "dust 💨",
+        "SA": "sand 💨",
+        "BLDU": "blowing dust 💨",
+        "BLSA": "blowing sand 💨",
+        "BLSN": "blowing snow ❄️💨",
+        "-FZDZ": "light freezing drizzle 🌧❄️",
+        "FZDZ": "freezing drizzle 🌧❄️",
+        "+FZDZ": "heavy freezing drizzle 🌧❄️❄️",
+        "-FZRA": "light freezing rain 🌧❄️",
+        "FZRA": "freezing rain 🌧❄️",
+        "+FZRA": "heavy freezing rain 🌧❄️❄️",
+        "-RASN": "light rain and snow 🌧❄️",
+        "RASN": "rain and snow 🌧❄️",
+        "+RASN": "heavy rain and snow 🌧❄️❄️",
+        "-SNRA": "light snow and rain 🌧❄️",
+        "SNRA": "snow and rain 🌧❄️",
+        "+SNRA": "heavy snow and rain 🌧❄️❄️",
+        "-SN": "light snow ❄️",
+        "SN": "snow ❄️",
+        "+SN": "heavy snow ❄️❄️❄️",
+        "-SHSN": "light snow showers ❄️",
+        "SHSN": "snow showers ❄️❄️❄️",
+        "+SHSN": "heavy snow showers ❄️❄️❄️❄️",
+        "-PL": "light ice pellets 🧊",
+        "PL": "ice pellets 🧊",
+        "+PL": "heavy ice pellets 🧊🧊",
+        "-SG": "light snow grains ❄️",
+        "SG": "snow grains ❄️",
+        "+SG": "heavy snow grains ❄️❄️",
+        "-GR": "light hail 🌨️",
+        "GR": "hail 🌨️",
+        "+GR": "heavy hail 🌨️🌨️",
+        "-GS": "light small hail 🌨️",
+        "GS": "small hail 🌨️",
+        "+GS": "heavy small hail 🌨️🌨️",
+    },
+    cloud={
+        "CLR": "sky clear ○",
+        "SKC": "sky clear ○",
+        "NSC": "no significant cloud",
+        "FEW": "few clouds ◔",
+        "SCT": "scattered clouds ◑",
+        "BKN": "broken clouds ◕",
+        "OVC": "overcast ●",
+    },
+    alerts={
+        "heat": ("🔥 Extreme heat", "✅ Heat has eased"),
+        "rain": ("☔ Rain", "✅ Rain has stopped"),
+        "thunder": ("⛈️ Thunderstorm", "✅ Thunderstorm has ended"),
+        "hail": ("🌨️ Hail", "✅ Hail has stopped"),
+        "wind": ("💨 Strong wind", "✅ Wind has eased"),
+        "fog": ("🌫️ Fog", "✅ Fog has cleared"),
+    },
+    hazards={
+        "TS": "⛈️ thunderstorm",
+        "CONVECTIVE": "⛈️ thunderstorm",
+        "CONV": "⛈️ thunderstorm",
+        "TURB": "🌀 turbulence",
+        "TURB-HI": "🌀 turbulence",
+        "TURB-LO": "🌀 turbulence",
+        "ICE": "🧊 icing",
+        "IFR": "☁️ IFR conditions",
+        "MT_OBSC": "⛰️ mountains obscured",
+        "MTN OBSCN": "⛰️ mountains obscured",
+        "MTN_OBS": "⛰️ mountains obscured",
+        "VA": "🌋 volcanic ash",
+        "ASH": "🌋 volcanic ash",
+        "TC": "🌀 tropical cyclone",
+        "LLWS": "💨 low-level wind shear",
+        "SFC_WIND": "💨 strong surface wind",
+        "DS": "💨 duststorm",
+        "SS": "💨 sandstorm",
+        "RDOACT CLD": "☢️ radioactive cloud",
+    },
+)
+
+LOCALES: dict[str, Locale] = {loc.code: loc for loc in (RU, EN)}
+
+
+def get_locale(code: str | None) -> Locale:
+    try:
+        return LOCALES[code or DEFAULT_LOCALE]
+    except KeyError:
+        raise ValueError(f"Unknown locale: {code} (available: {', '.join(LOCALES)})") from None
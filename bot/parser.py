@@ -6,6 +6,8 @@ from datetime import datetime, timezone
 
 from metar import Metar
 
+from .locales import Locale, get_locale
+
 import re
 
 logger = logging.getLogger(__name__)
@@ -29,30 +31,39 @@ class WeatherData:
     visibility_m: int | None = None
     cloud: str | None = None
     phenomena: list[str] | None = None
+    # (cover, height_ft, cloud_type) layers, so reports can describe the sky in any locale
+    sky: list[tuple[str, int | None, str | None]] | None = None
 
 
-def _parse_metar(metar_raw: str) -> Metar.Metar:
+def _parse_metar(metar_raw: str, ref_time: datetime | None = None) -> Metar.Metar:
+    # month/year let historical reports resolve to the right date instead of "now"
+    month = ref_time.month if ref_time else None
+    year = ref_time.year if ref_time else None
     try:
-        return Metar.Metar(metar_raw, strict=False)  # newer python-metar supports strict arg
+        return Metar.Metar(metar_raw, month=month, year=year, strict=False)  # newer python-metar supports strict arg
     except TypeError:
         # fallback for older versions (<1.5) where 'strict' not supported
-        return Metar.Metar(metar_raw)
+        return Metar.Metar(metar_raw, month=month, year=year)
 
 
 _TAF_TIME_RE = re.compile(r"^(\d{6})Z")
 
 
-def _extract_taf_issue_time(taf_raw: str) -> datetime:
-    """Extract TAF issue time from raw string (first 6 digits indicate DDHHMMZ)."""
+def _extract_taf_issue_time(taf_raw: str, ref_time: datetime | None = None) -> datetime:
+    """Extract TAF issue time from raw string (first 6 digits indicate DDHHMMZ).
+
+    *ref_time* is the moment the TAF was current (defaults to now) and is used to
+    resolve month and year.
+    """
+    now = ref_time or datetime.now(timezone.utc)
     match = _TAF_TIME_RE.search(taf_raw.strip())
     if not match:
-        # fallback: use current UTC time
-        return datetime.now(timezone.utc)
+        # fallback: use reference time
+        return now
     time_token = match.group(1)
     day = int(time_token[:2])
     hour = int(time_token[2:4])
     minute = int(time_token[4:6])
-    now = datetime.now(timezone.utc)
     # Handle month rollover if needed
     year = now.year
     month = now.month
@@ -68,46 +79,53 @@ def _extract_taf_issue_time(taf_raw: str) -> datetime:
 
 # ---------------- Sky decoding ------------------
 
-_COVER_MAP = {
-    "SKC": "ясно",
-    "CLR": "ясно",
-    "FEW": "небольшая облачность",
-    "SCT": "рассеянная облачность",
-    "BKN": "облачно",
-    "OVC": "сплошная облачность",
-}
-
-
-def _decode_sky(sky_list) -> str | None:
-    parts: list[str] = []
+def _sky_layers(sky_list) -> list[tuple[str, int | None, str | None]]:
+    layers: list[tuple[str, int | None, str | None]] = []
     for item in sky_list:
         try:
             cover = item[0]
             height_ft = item[1].value() if hasattr(item[1], "value") else item[1]
             cloud_type = item[2] if len(item) > 2 else None
         except Exception:
-            parts.append(str(item))
+            layers.append((str(item), None, None))
             continue
+        layers.append((cover, int(height_ft) if height_ft else None, cloud_type))
+    return layers
 
-        desc = _COVER_MAP.get(cover, cover)
+
+def describe_sky(layers, locale: Locale | None = None) -> str | None:
+    """Human-readable sky description of :func:`_sky_layers` output."""
+    loc = locale or get_locale(None)
+    parts: list[str] = []
+    for cover, height_ft, cloud_type in layers:
+        desc = loc.cover.get(cover, cover)
         if height_ft:
             meters = int(round(float(height_ft) * 0.3048))
-            desc = f"{desc} {meters} м"
+            desc = loc.text["height"].format(desc=desc, m=meters)
         if cloud_type in {"CB", "TCU"}:
-            desc += " (кучево-дождевые облака)" if cloud_type == "CB" else " (башенные кучевые облака)"
+            desc += loc.text["sky_cb"] if cloud_type == "CB" else loc.text["sky_tcu"]
         parts.append(desc)
 
     return ", ".join(parts) if parts else None
 
 
-def decode_metar_taf(icao: str, metar_raw: str, taf_raw: str) -> WeatherData:
-    """Decode raw METAR/TAF strings into structured WeatherData object."""
+def decode_metar_taf(icao: str, metar_raw: str, taf_raw: str, *, ref_time: datetime | None = None) -> WeatherData:
+    """Decode raw METAR/TAF strings into structured WeatherData object.
 
-    m = _parse_metar(metar_raw)
+    *ref_time* anchors day-of-month timestamps to a month/year; pass it when decoding
+    historical reports, leave it ``None`` for live data.
+    """
+
+    m = _parse_metar(metar_raw, ref_time)
 
     # Fallback to UTC if tz not specified
     metar_time = m.time.replace(tzinfo=timezone.utc)
-    taf_issue_time = _extract_taf_issue_time(taf_raw)
+    # Without an issue time the TAF is keyed by the observation rather than "now", so
+    # the same METAR/TAF pair is recognised as already stored on every later run
+    if _TAF_TIME_RE.search(taf_raw.strip()):
+        taf_issue_time = _extract_taf_issue_time(taf_raw, ref_time)
+    else:
+        taf_issue_time = metar_time
 
     pressure_hpa: int | None
     if hasattr(m, "pressure") and m.pressure:
@@ -131,6 +149,7 @@ def decode_metar_taf(icao: str, metar_raw: str, taf_raw: str) -> WeatherData:
             else:
                 pressure_hpa = None
 
+    sky = _sky_layers(m.sky) if m.sky else []
     wd = WeatherData(
         icao=icao,
         metar_time=metar_time,
@@ -144,8 +163,9 @@ def decode_metar_taf(icao: str, metar_raw: str, taf_raw: str) -> WeatherData:
         wind_speed_kt=int(m.wind_speed.value()) if m.wind_speed else None,
         wind_gust_kt=int(m.wind_gust.value()) if m.wind_gust else None,
         visibility_m=m.vis.value() if m.vis else None,
-        cloud=_decode_sky(m.sky) if m.sky else None,
+        cloud=describe_sky(sky) if sky else None,
         phenomena=[str(p) for p in m.weather] if m.weather else None,
+        sky=sky or None,
     )
     logger.debug("Decoded METAR/TAF: %s", wd)
     return wd
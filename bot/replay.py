@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import argparse
+import calendar
+import gzip
+import logging
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from . import db, parser as parser_module, taf_summary, verify
+
+logger = logging.getLogger(__name__)
+
+_STAMP_RE = re.compile(r"^(\d{4})/(\d{2})/(\d{2})\s+(\d{2}):(\d{2})$")
+_MONTH_RE = re.compile(r"(?<!\d)((?:19|20)\d{2})[-_]?(0[1-9]|1[0-2])(?!\d)")
+_ICAO_RE = re.compile(r"^[A-Z][A-Z0-9]{3}$")
+_TAF_CONTINUATION = ("FM", "BECMG", "TEMPO", "PROB", "INTER")
+
+PROGRESS_EVERY_S = 5.0
+TAF_WINDOW = timedelta(hours=30)  # longest TAF validity; older TAFs pair with nothing
+
+
+@dataclass
+class Record:
+    kind: str  # "METAR" or "TAF"
+    icao: str
+    text: str
+    ref_time: datetime | None
+
+
+@dataclass
+class Chunk:
+    source: str
+    end_record: int  # checkpoint value once this chunk is committed
+    last: bool  # chunk closes its source file
+    items: list[tuple[str, str, str, datetime | None]] = field(default_factory=list)
+
+
+@dataclass
+class Stats:
+    records: int = 0
+    decoded: int = 0
+    inserted: int = 0
+    scored: int = 0
+    errors: int = 0
+    unpaired: int = 0
+    undated: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"{self.records} records, {self.decoded} decoded, {self.inserted} inserted, {self.scored} scored, "
+            f"{self.errors} errors, {self.unpaired} without TAF, {self.undated} undated – "
+            f"{self.decoded / elapsed:.0f} reports/s"
+        )
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "rt", encoding="utf-8", errors="replace")
+
+
+def month_reference(value: str) -> datetime | None:
+    """Last minute of the first ``YYYY-MM``/``YYYYMM`` month named in *value*, if any.
+
+    Day-of-month report times resolve to that month when anchored at its end.
+    """
+    match = _MONTH_RE.search(value)
+    if not match:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    return datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, tzinfo=timezone.utc)
+
+
+def iter_records(path: Path, month_ref: datetime | None = None) -> Iterator[Record]:
+    """Stream METAR/TAF records from a raw archive file.
+
+    Understands the NOAA tgftp layout (``YYYY/MM/DD HH:MM`` stamp line before each
+    report, which also dates the report) as well as plain dumps with one METAR per line
+    and ``TAF ...`` blocks whose change groups continue on following lines. Reports
+    without a stamp are dated by *month_ref* (see :func:`month_reference`); without one
+    their ``ref_time`` is ``None``.
+    """
+    ref_time: datetime | None = month_ref
+    taf_lines: list[str] = []
+    taf_icao = ""
+
+    def _flush_taf():
+        nonlocal taf_lines
+        record = Record("TAF", taf_icao, "\n".join(taf_lines), ref_time) if taf_lines else None
+        taf_lines = []
+        return record
+
+    with _open_text(path) as fh:
+        for raw_line in fh:
+            line = raw_line.strip().rstrip("=").strip()
+            if not line:
+                continue
+            stamp = _STAMP_RE.match(line)
+            if stamp:
+                if (record := _flush_taf()) is not None:
+                    yield record
+                y, mo, d, h, mi = (int(g) for g in stamp.groups())
+                ref_time = datetime(y, mo, d, h, mi, tzinfo=timezone.utc)
+                continue
+
+            tokens = line.split()
+            head = tokens[0].upper()
+            if taf_lines and (raw_line[:1].isspace() or head.startswith(_TAF_CONTINUATION)):
+                taf_lines.append(line)
+                continue
+            if (record := _flush_taf()) is not None:
+                yield record
+
+            if head == "TAF":
+                tokens = tokens[1:]
+                if tokens and tokens[0].upper() in {"AMD", "COR", "RTD"}:
+                    tokens = tokens[1:]
+                if tokens and _ICAO_RE.match(tokens[0].upper()):
+                    taf_icao = tokens[0].upper()
+                    taf_lines = [" ".join(tokens[1:])] if len(tokens) > 1 else []
+                continue
+
+            if head in {"METAR", "SPECI"}:
+                tokens = tokens[1:]
+            if tokens and _ICAO_RE.match(tokens[0].upper()) and len(tokens) >= 2:
+                yield Record("METAR", tokens[0].upper(), " ".join(tokens), ref_time)
+
+    if (record := _flush_taf()) is not None:
+        yield record
+
+
+def _report_time(text: str, ref_time: datetime | None) -> datetime | None:
+    """Resolve the ``DDHHMMZ`` group at the start of *text* (a TAF, or a METAR without its ICAO)."""
+    try:
+        return parser_module._extract_taf_issue_time(text, ref_time)
+    except ValueError:  # day that does not exist in the resolved month
+        return None
+
+
+class _TafHistory:
+    """Recent TAFs per station, ordered by issue time, to pair METARs by time.
+
+    TAFs issued more than :data:`TAF_WINDOW` before a station's latest paired METAR
+    have expired and are dropped, so memory stays bounded by the window.
+    """
+
+    def __init__(self, rows: Iterable[tuple[str, str, str]] = ()) -> None:
+        self._times: dict[str, list[datetime]] = {}
+        self._texts: dict[str, list[str]] = {}
+        for icao, issued, text in rows:
+            self._insert(icao, datetime.fromisoformat(issued), text)
+
+    def add(self, record: Record) -> None:
+        issued = _report_time(record.text, record.ref_time)
+        if issued is not None:
+            self._insert(record.icao, issued, record.text)
+
+    def _insert(self, icao: str, issued: datetime, text: str) -> None:
+        times = self._times.setdefault(icao, [])
+        texts = self._texts.setdefault(icao, [])
+        idx = bisect_right(times, issued)
+        if idx and times[idx - 1] == issued:
+            texts[idx - 1] = text  # amendment re-issued under the same time
+            return
+        times.insert(idx, issued)
+        texts.insert(idx, text)
+
+    def valid_at(self, icao: str, metar: Record) -> str | None:
+        """The latest TAF of *icao* issued within the window before the METAR's observation time."""
+        times = self._times.get(icao)
+        parts = metar.text.split(maxsplit=1)
+        observed = _report_time(parts[1], metar.ref_time) if times and len(parts) > 1 else None
+        if observed is None:
+            return None
+        texts = self._texts[icao]
+        expired = bisect_left(times, observed - TAF_WINDOW)
+        if expired:
+            del times[:expired], texts[:expired]
+        idx = bisect_right(times, observed)
+        return texts[idx - 1] if idx else None
+
+    def rows(self) -> list[tuple[str, str, str]]:
+        """``(icao, issued, text)`` rows to store with the replay checkpoints."""
+        return [
+            (icao, issued.isoformat(timespec="seconds"), text)
+            for icao, times in self._times.items()
+            for issued, text in zip(times, self._texts[icao])
+        ]
+
+
+def iter_chunks(
+    paths: list[Path],
+    chunk_size: int,
+    checkpoints: dict[str, tuple[int, bool]],
+    stats: Stats,
+    tafs: _TafHistory,
+    month: datetime | None = None,
+) -> Iterator[Chunk]:
+    """Pair every METAR with its station's TAF current at observation time and cut the stream into chunks.
+
+    Only the current chunk and *tafs* are held in memory. *tafs* starts from the history
+    stored with the checkpoints, so files replayed earlier are skipped; records of a
+    partly replayed file are re-read for their TAFs but not emitted. Reports without a
+    stamp line are dated by *month*, else by a month in the file name, else skipped.
+    """
+    for path in paths:
+        source = str(path.resolve())
+        skip, done = checkpoints.get(source, (0, False))
+        if done:
+            logger.info("Skipping %s – already replayed", path)
+            continue
+        month_ref = month or month_reference(path.name)
+        chunk = Chunk(source, skip, False)
+        count = 0
+        undated = 0
+        for record in iter_records(path, month_ref):
+            count += 1
+            if record.ref_time is None:
+                if count > skip:
+                    undated += 1
+                continue
+            if record.kind == "TAF":
+                tafs.add(record)
+            if count <= skip:
+                continue
+            stats.records += 1
+            if record.kind == "METAR":
+                taf_raw = tafs.valid_at(record.icao, record)
+                if taf_raw is None:
+                    stats.unpaired += 1
+                else:
+                    chunk.items.append((record.icao, record.text, taf_raw, record.ref_time))
+            chunk.end_record = count
+            if len(chunk.items) >= chunk_size:
+                yield chunk
+                chunk = Chunk(source, count, False)
+        if undated:
+            stats.undated += undated
+            logger.warning("%s: %d reports without a date stamp skipped; pass --month YYYY-MM", path, undated)
+        chunk.last = True
+        chunk.end_record = count
+        yield chunk
+
+
+def decode_chunk(items: list[tuple[str, str, str, datetime | None]]) -> tuple[list[parser_module.WeatherData], list[str]]:
+    """Worker entry point: decode a chunk and run the TAF summariser over each new TAF."""
+    decoded: list[parser_module.WeatherData] = []
+    errors: list[str] = []
+    summarised: set[str] = set()
+    for icao, metar_raw, taf_raw, ref_time in items:
+        try:
+            data = parser_module.decode_metar_taf(icao, metar_raw, taf_raw, ref_time=ref_time)
+            if taf_raw not in summarised:
+                summarised.add(taf_raw)
+                taf_summary.summarize_taf(taf_raw, data.taf_issue_time, "UTC")
+        except Exception as e:  # noqa: BLE001
+            errors.append(f"{metar_raw!r}: {e}")
+            continue
+        decoded.append(data)
+    return decoded, errors
+
+
+def replay(
+    paths: list[Path],
+    *,
+    workers: int | None = None,
+    chunk_size: int = 500,
+    batch_size: int = 20_000,
+    resume: bool = True,
+    month: datetime | None = None,
+) -> Stats:
+    """Decode raw report files across a process pool and bulk-insert them into SQLite.
+
+    Chunks are committed strictly in input order together with their checkpoint and the
+    TAF history, so an interrupted replay resumes exactly after the last committed chunk
+    without re-reading finished files. Each committed batch is then scored for TAF
+    verification. At most ``2 * workers`` chunks are in flight,
+    which keeps memory flat for any archive size.
+    """
+    db.init_db()
+    checkpoints = db.get_replay_checkpoints() if resume else {}
+    tafs = _TafHistory(db.load_replay_tafs() if resume else ())
+    workers = workers or os.cpu_count() or 1
+    stats = Stats()
+    pending_rows: list[parser_module.WeatherData] = []
+    pending_checkpoints: dict[str, tuple[int, bool]] = {}
+    in_flight: deque[tuple[Chunk, Future]] = deque()
+    last_report = time.monotonic()
+
+    def _flush():
+        nonlocal pending_rows, pending_checkpoints
+        if pending_checkpoints:
+            stats.inserted += db.insert_replay_batch(pending_rows, pending_checkpoints, tafs.rows())
+            # the verification watermark skips whatever an earlier run already scored
+            stats.scored += verify.record(pending_rows)
+        pending_rows, pending_checkpoints = [], {}
+
+    def _collect(chunk: Chunk, future: Future):
+        nonlocal last_report
+        decoded, errors = future.result()
+        stats.decoded += len(decoded)
+        stats.errors += len(errors)
+        for err in errors[:3]:
+            logger.debug("Decode failed: %s", err)
+        pending_rows.extend(decoded)
+        pending_checkpoints[chunk.source] = (chunk.end_record, chunk.last)
+        if len(pending_rows) >= batch_size:
+            _flush()
+        if time.monotonic() - last_report >= PROGRESS_EVERY_S:
+            logger.info("Replay progress: %s", stats.line())
+            last_report = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in iter_chunks(paths, chunk_size, checkpoints, stats, tafs, month):
+            in_flight.append((chunk, pool.submit(decode_chunk, chunk.items)))
+            while len(in_flight) > 2 * workers or (in_flight and in_flight[0][1].done()):
+                _collect(*in_flight.popleft())
+        while in_flight:
+            _collect(*in_flight.popleft())
+    _flush()
+
+    logger.info("Replay finished: %s", stats.line())
+    return stats
+
+
+def _expand(inputs: list[str]) -> list[Path]:
+    paths: list[Path] = []
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            paths.extend(sorted(f for f in p.rglob("*") if f.is_file()))
+        else:
+            paths.append(p)
+    return paths
+
+
+def parse_args(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(prog="weather-bot replay", description="Replay archived raw METAR/TAF files into the database")
+    p.add_argument("paths", nargs="+", help="Raw report files (optionally .gz) or directories, TAF-bearing files first")
+    p.add_argument("--workers", type=int, default=None, help="Decoder processes (default: all cores)")
+    p.add_argument("--chunk-size", type=int, default=500, help="Reports per worker task")
+    p.add_argument("--batch-size", type=int, default=20_000, help="Rows per SQLite transaction")
+    p.add_argument("--no-resume", action="store_true", help="Ignore stored checkpoints and start over")
+    p.add_argument(
+        "--month",
+        type=_month_arg,
+        default=None,
+        help="YYYY-MM of reports without a date stamp line (default: taken from the file name)",
+    )
+    return p.parse_args(argv)
+
+
+def _month_arg(value: str) -> datetime:
+    ref = month_reference(value)
+    if ref is None:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
+    return ref
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    stats = replay(
+        _expand(args.paths),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        resume=not args.no_resume,
+        month=args.month,
+    )
+    return 0 if stats.decoded or not stats.records else 1
@@ -1,38 +1,65 @@
 from __future__ import annotations
 
 import logging
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Iterable, List
 import math
 
-from dateutil import tz
+from .alerts import default_engine
+from .locales import DEFAULT_LOCALE, Locale, get_locale
+from .parser import WeatherData, describe_sky
+from .stations import get_tzinfo
 
-from .parser import WeatherData
+if TYPE_CHECKING:
+    from .hazards import Hazard
+    from .verify import Reliability
 
 logger = logging.getLogger(__name__)
 
-_TEMPLATE_PATH = Path(__file__).with_suffix("").parent / "templates" / "report_template.txt"
+_TEMPLATE_DIR = Path(__file__).with_suffix("").parent / "templates"
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
 
+# (template name, locale) -> compiled str.format pattern
+_TEMPLATES: dict[tuple[str, str], str] = {}
 
-ALERT_RULES = [
-    (lambda d: (d.temperature_c or 0) > 30, "🔥 Сильная жара"),
-    (lambda d: any(code.startswith("RA") for code in d.phenomena or []), "☔ Дождь"),
-    (lambda d: any("TS" in code for code in d.phenomena or []), "⛈️ Гроза"),
-    (lambda d: any(code in {"GR", "GS"} for code in d.phenomena or []), "🌨️ Град"),
-    (lambda d: (d.wind_gust_kt or 0) >= 30 or (d.wind_speed_kt or 0) >= 30, "💨 Сильный ветер"),
-    (lambda d: "FG" in (d.phenomena or []) or (d.visibility_m or 9999) < 1000, "🌫️ Туман"),
-]
 
+def _template_path(name: str, locale: str) -> Path:
+    localized = _TEMPLATE_DIR / f"{name}_template.{locale}.txt"
+    if localized.exists():
+        return localized
+    if locale == DEFAULT_LOCALE:
+        return _TEMPLATE_DIR / f"{name}_template.txt"
+    raise ValueError(f"No {name} template for locale {locale}")
 
-def _load_template() -> str:
-    txt = _TEMPLATE_PATH.read_text(encoding="utf-8")
-    # Convert Jinja-style {{var}} to Python format {var}
-    return txt.replace("{{", "{").replace("}}", "}")
+
+def _compile(text: str) -> str:
+    """Turn Jinja-style ``{{var}}`` placeholders into a ``str.format`` pattern.
+
+    Literal braces are escaped, so template text can contain ``{`` and ``}`` safely.
+    """
+    out: list[str] = []
+    pos = 0
+    for m in _PLACEHOLDER_RE.finditer(text):
+        out.append(text[pos : m.start()].replace("{", "{{").replace("}", "}}"))
+        out.append("{" + m.group(1) + "}")
+        pos = m.end()
+    out.append(text[pos:].replace("{", "{{").replace("}", "}}"))
+    return "".join(out)
+
+
+def get_template(name: str = "report", locale: str = DEFAULT_LOCALE) -> str:
+    """Return the compiled template, reading and compiling it on first use only."""
+    key = (name, locale)
+    template = _TEMPLATES.get(key)
+    if template is None:
+        template = _TEMPLATES[key] = _compile(_template_path(name, locale).read_text(encoding="utf-8"))
+    return template
 
 
 def _local_time(dt: datetime, timezone_str: str) -> str:
-    target_tz = tz.gettz(timezone_str)
+    target_tz = get_tzinfo(timezone_str)
     return dt.astimezone(target_tz).strftime("%H:%M")
 
 
@@ -43,14 +70,40 @@ def knots_to_kmh(knots: int | float | None) -> int | None:
     return int(round(knots * 1.852))
 
 
-def _wind_gust_suffix(gust_kt: int | None) -> str:
+def _wind_gust_suffix(gust_kt: int | None, loc: Locale | None = None) -> str:
     gust_kmh = knots_to_kmh(gust_kt)
-    return f", порывы {gust_kmh} км/ч" if gust_kmh else ""
+    return (loc or get_locale(None)).text["gusts"].format(kmh=gust_kmh) if gust_kmh else ""
+
+
+def build_alerts(
+    data: WeatherData,
+    hazards: list[Hazard] | None = None,
+    messages: list[str] | None = None,
+    loc: Locale | None = None,
+) -> str:
+    """Join alert messages for the report.
+
+    *messages* (e.g. state transitions from :class:`alerts.AlertEngine`) replace the
+    stateless rule check when given.
+    """
+    if messages is not None:
+        alerts: List[str] = list(messages)
+    else:
+        loc = loc or get_locale(None)
+        alerts = [loc.alert(r.key, True, r.message) for r in default_engine().matches(data)]
+    # One line per hazard kind even if several overlapping polygons cover the airport
+    alerts.extend(dict.fromkeys(f"⚠️ {h.describe(loc)}" for h in hazards or []))
+    return " • ".join(alerts)
 
 
-def build_alerts(data: WeatherData) -> str:
-    alerts: List[str] = [msg for rule, msg in ALERT_RULES if rule(data)]
-    return " • ".join(alerts)
+def build_reliability(reliability: Reliability, loc: Locale | None = None) -> str:
+    """One line with the station's TAF hit rates, e.g. "wind 82%, visibility 91%"."""
+    loc = loc or get_locale(None)
+    items = ", ".join(
+        loc.text["rel_item"].format(name=loc.text[f"rel_{element}"], pct=round(ratio * 100))
+        for element, ratio in reliability.ratios.items()
+    )
+    return loc.text["reliability"].format(days=reliability.days, items=items)
 
 
 def rel_humidity(temp_c: float, dew_c: float) -> int:
@@ -59,32 +112,46 @@ def rel_humidity(temp_c: float, dew_c: float) -> int:
     return int(round(rh))
 
 
-def generate_report(data: WeatherData, timezone_str: str, taf_text: str, *, include_raw: bool = False) -> str:
-    template = _load_template()
+def _render(
+    template: str,
+    loc: Locale,
+    data: WeatherData,
+    timezone_str: str,
+    taf_text: str,
+    include_raw: bool,
+    hazards: list[Hazard] | None,
+    alert_messages: list[str] | None,
+    reliability: Reliability | None = None,
+) -> str:
+    n_a = loc.text["n_a"]
 
     # calculate relative humidity
     if data.temperature_c is not None and data.dewpoint_c is not None:
         humidity = str(rel_humidity(data.temperature_c, data.dewpoint_c))
     else:
-        humidity = "N/A"
+        humidity = n_a
 
+    cloud = describe_sky(data.sky, loc) if data.sky else data.cloud
     report = template.format(
         icao=data.icao,
         time_local=_local_time(data.metar_time, timezone_str),
         timezone_region=timezone_str,
-        temperature_c=f"{data.temperature_c:+.0f}" if data.temperature_c is not None else "N/A",
+        temperature_c=f"{data.temperature_c:+.0f}" if data.temperature_c is not None else n_a,
         humidity=humidity,
-        dewpoint_c=f"{data.dewpoint_c:+.0f}" if data.dewpoint_c is not None else "N/A",
+        dewpoint_c=f"{data.dewpoint_c:+.0f}" if data.dewpoint_c is not None else n_a,
         wind_dir_deg=data.wind_dir_deg if data.wind_dir_deg is not None else "VRB",
         wind_speed_kmh=knots_to_kmh(data.wind_speed_kt) if data.wind_speed_kt is not None else 0,
-        wind_gust=_wind_gust_suffix(data.wind_gust_kt),
-        cloud=data.cloud or "CAVOK",
-        pressure_hpa=data.pressure_hpa or "N/A",
+        wind_gust=_wind_gust_suffix(data.wind_gust_kt, loc),
+        cloud=cloud or loc.text["cavok"],
+        pressure_hpa=data.pressure_hpa or n_a,
         taf_summary=taf_text,
         taf_text=taf_text,
-        alerts=build_alerts(data),
+        alerts=build_alerts(data, hazards, alert_messages, loc),
     )
 
+    if reliability is not None and reliability.ratios:
+        report += build_reliability(reliability, loc) + "\n"
+
     # Append raw METAR and TAF for full reference
     if include_raw:
         report += (
@@ -93,5 +160,41 @@ def generate_report(data: WeatherData, timezone_str: str, taf_text: str, *, incl
             "TAF:\n"
             f"{data.taf_raw}\n"
         )
+    return report
+
+
+def generate_report(
+    data: WeatherData,
+    timezone_str: str,
+    taf_text: str,
+    *,
+    include_raw: bool = False,
+    hazards: list[Hazard] | None = None,
+    alert_messages: list[str] | None = None,
+    locale: str = DEFAULT_LOCALE,
+    reliability: Reliability | None = None,
+) -> str:
+    report = _render(
+        get_template("report", locale),
+        get_locale(locale),
+        data,
+        timezone_str,
+        taf_text,
+        include_raw,
+        hazards,
+        alert_messages,
+        reliability,
+    )
     logger.debug("Generated report: %s", report)
     return report
+
+
+def generate_reports(
+    batch: Iterable[tuple[WeatherData, str, str]],
+    *,
+    include_raw: bool = False,
+    locale: str = DEFAULT_LOCALE,
+) -> list[str]:
+    """Render ``(data, timezone, taf_text)`` items with one template and locale lookup."""
+    template, loc = get_template("report", locale), get_locale(locale)
+    return [_render(template, loc, data, tz_name, taf_text, include_raw, None, None) for data, tz_name, taf_text in batch]
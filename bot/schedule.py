@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Iterable
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+HISTORY = timedelta(days=2)
+DEFAULT_DELAY = timedelta(minutes=5)
+MIN_DELAY = timedelta(minutes=1)
+MAX_DELAY = timedelta(minutes=20)
+# Re-check ladder once an expected report is overdue; the last step repeats.
+RETRY_LADDER = (timedelta(minutes=2), timedelta(minutes=5), timedelta(minutes=10), timedelta(minutes=20))
+ACTIVE_INTERVAL = timedelta(minutes=10)  # SPECIs are likely in active weather
+MAX_INTERVAL = timedelta(hours=1)
+TAF_EARLY = timedelta(minutes=40)  # TAFs are issued ahead of their nominal hour
+SLOT_SHARE = 0.3  # a minute-of-hour is a routine slot if seen in this share of hours
+
+
+@dataclass(frozen=True)
+class Cadence:
+    """Issuance pattern learned from a station's stored history."""
+
+    slots: tuple[int, ...]  # routine METAR minutes past the hour, e.g. (0, 30)
+    delay: timedelta  # typical time from observation to availability upstream
+    last_metar: datetime | None = None
+    last_taf: datetime | None = None
+    taf_interval: timedelta | None = None
+
+    def next_metar_available(self, after: datetime) -> datetime | None:
+        """When the first routine METAR observed after *after* should be fetchable."""
+        if not self.slots:
+            return None
+        hour = after.replace(minute=0, second=0, microsecond=0)
+        for h in range(3):
+            for minute in self.slots:
+                candidate = hour + timedelta(hours=h, minutes=minute)
+                if candidate > after:
+                    return candidate + self.delay
+        return None
+
+    def next_taf_available(self) -> datetime | None:
+        if self.last_taf is None or self.taf_interval is None:
+            return None
+        return self.last_taf + self.taf_interval - TAF_EARLY + self.delay
+
+
+def _parse(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def learn_cadence(icao: str, now: datetime | None = None) -> Cadence:
+    now = now or datetime.now(timezone.utc)
+    rows = db.fetch_issuance_history(icao, now - HISTORY)
+    if not rows:
+        return Cadence(slots=(), delay=DEFAULT_DELAY)
+
+    metar_times = sorted({_parse(r[0]) for r in rows})
+    taf_times = sorted({_parse(r[1]) for r in rows})
+
+    hours = max(1, len({t.replace(minute=0, second=0, microsecond=0) for t in metar_times}))
+    minute_counts = Counter(t.minute for t in metar_times)
+    slots = tuple(sorted(m for m, n in minute_counts.items() if n >= max(2, SLOT_SHARE * hours)))
+
+    # created_at is bounded by when we happened to poll, so the low end of the
+    # distribution is the best estimate of when reports actually appear.
+    delays = sorted((_parse(created) - _parse(metar)) for metar, _, created in rows if created)
+    if delays:
+        delay = delays[len(delays) // 5]
+        delay = min(max(delay, MIN_DELAY), MAX_DELAY)
+    else:
+        delay = DEFAULT_DELAY
+
+    taf_gaps = [b - a for a, b in zip(taf_times, taf_times[1:]) if b - a >= timedelta(hours=1)]
+    taf_interval = median(taf_gaps) if taf_gaps else None
+
+    return Cadence(
+        slots=slots,
+        delay=delay,
+        last_metar=metar_times[-1],
+        last_taf=taf_times[-1],
+        taf_interval=taf_interval,
+    )
+
+
+def plan_next(cadence: Cadence, now: datetime, attempts: int = 0, active: bool = False) -> datetime:
+    """Pick the next fetch time for a station.
+
+    Normally just after the next routine METAR (or TAF) should be available. When the
+    expected report is overdue, *attempts* (consecutive fetches without news, 1 on the
+    first miss) walks the retry ladder from its first step. Active weather and
+    :data:`MAX_INTERVAL` cap the gap so SPECIs are not missed.
+    """
+    candidates = [now + MAX_INTERVAL]
+    expected = cadence.next_metar_available(cadence.last_metar or now)
+    if expected is not None and expected > now:
+        candidates.append(expected)
+    else:
+        candidates.append(now + RETRY_LADDER[min(max(attempts - 1, 0), len(RETRY_LADDER) - 1)])
+    taf_expected = cadence.next_taf_available()
+    if taf_expected is not None and taf_expected > now:
+        candidates.append(taf_expected)
+    if active:
+        candidates.append(now + ACTIVE_INTERVAL)
+    return min(candidates)
+
+
+def due(icaos: Iterable[str], chat: str, now: datetime | None = None) -> list[str]:
+    """Filter *icaos* to stations whose fetch for *chat* has come (or never planned).
+
+    Plans are kept per chat: one chat's fetch must not hide an observation that
+    another chat has not received yet.
+    """
+    now = now or datetime.now(timezone.utc)
+    icaos = list(icaos)
+    planned = db.load_poll_states(chat, set(icaos))
+    return [icao for icao in icaos if icao not in planned or planned[icao][0] <= now]
+
+
+def plan(icao: str, got_new: bool, previous_attempts: int | None, now: datetime | None = None) -> tuple[datetime, int]:
+    """Plan the next fetch after one with outcome *got_new*; returns ``(next_due, attempts)``.
+
+    Reads history only, so callers keeping their own poll state (the HTTP server) can
+    use it without touching the ``poll_state`` of cron runs and workers.
+    """
+    now = now or datetime.now(timezone.utc)
+    attempts = 0 if got_new or previous_attempts is None else previous_attempts + 1
+    active = icao in db.active_alert_stations({icao})
+    return plan_next(learn_cadence(icao, now), now, attempts, active), attempts
+
+
+def record(icao: str, got_new: bool, chat: str, now: datetime | None = None) -> datetime:
+    """Store the outcome of a fetch for *chat* and plan the next one; returns the planned time."""
+    now = now or datetime.now(timezone.utc)
+    previous = db.load_poll_states(chat, {icao}).get(icao)
+    next_due, attempts = plan(icao, got_new, previous[1] if previous else None, now)
+    db.save_poll_state(chat, icao, next_due, attempts, now)
+    logger.debug("Next fetch for %s at %s (attempt %d)", icao, next_due, attempts)
+    return next_due
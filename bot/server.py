@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import breaker, db, parser as parser_module, schedule, stations, taf_summary
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LEN = 288  # observations kept per station (a day of 5-minute SPECI-heavy data)
+BULK_CACHE_SIZE = 256
+LOOP_TICK_S = 30.0
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    raise TypeError(f"Not JSON serialisable: {type(value).__name__}")
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+class _Body:
+    """Pre-encoded response: JSON bytes, gzip bytes and a strong ETag."""
+
+    __slots__ = ("raw", "gzipped", "etag")
+
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+        self.gzipped = gzip.compress(raw, compresslevel=6)
+        self.etag = '"' + hashlib.sha1(raw).hexdigest() + '"'
+
+
+class ObservationStore:
+    """Latest decoded observation, TAF summary and short history per station.
+
+    Everything a request can ask for is serialised when the data changes, so serving
+    a request is a dictionary lookup plus a socket write.
+    """
+
+    def __init__(self, history_len: int = HISTORY_LEN) -> None:
+        self._lock = threading.Lock()
+        self._history_len = history_len
+        self._latest: dict[str, dict] = {}
+        self._history: dict[str, deque[dict]] = {}
+        self._latest_body: dict[str, _Body] = {}
+        self._history_body: dict[str, _Body] = {}
+        self._index_body = _Body(_dumps({"stations": []}))
+        self._bulk: OrderedDict[tuple[str, ...], tuple[tuple[str, ...], _Body]] = OrderedDict()
+
+    def is_new(self, data: parser_module.WeatherData) -> bool:
+        """Whether *data* is newer than the latest observation held for its station."""
+        entry = self._latest.get(data.icao)
+        return entry is None or entry["observation"]["metar_time"] < data.metar_time
+
+    def update(self, data: parser_module.WeatherData, taf_text: str | None = None) -> None:
+        entry = {"observation": asdict(data), "taf_summary": taf_text, "updated_at": datetime.now(timezone.utc)}
+        point = {
+            "metar_time": data.metar_time,
+            "temperature_c": data.temperature_c,
+            "dewpoint_c": data.dewpoint_c,
+            "pressure_hpa": data.pressure_hpa,
+            "wind_dir_deg": data.wind_dir_deg,
+            "wind_speed_kt": data.wind_speed_kt,
+            "wind_gust_kt": data.wind_gust_kt,
+            "visibility_m": data.visibility_m,
+        }
+        with self._lock:
+            history = self._history.setdefault(data.icao, deque(maxlen=self._history_len))
+            if history and history[-1]["metar_time"] >= data.metar_time:
+                if history[-1]["metar_time"] == data.metar_time:
+                    history[-1] = point
+            else:
+                history.append(point)
+            self._latest[data.icao] = entry
+            self._latest_body[data.icao] = _Body(_dumps({"icao": data.icao, **entry}))
+            self._history_body[data.icao] = _Body(_dumps({"icao": data.icao, "history": list(history)}))
+            self._index_body = _Body(_dumps({"stations": sorted(self._latest)}))
+
+    def latest(self, icao: str) -> _Body | None:
+        return self._latest_body.get(icao)
+
+    def history(self, icao: str) -> _Body | None:
+        return self._history_body.get(icao)
+
+    def index(self) -> _Body:
+        return self._index_body
+
+    def bulk(self, icaos: tuple[str, ...]) -> _Body:
+        """Combined latest observations; cached until one of the stations changes."""
+        bodies = [self._latest_body.get(i) for i in icaos]
+        etags = tuple(b.etag if b else "" for b in bodies)
+        with self._lock:
+            cached = self._bulk.get(icaos)
+            if cached is not None and cached[0] == etags:
+                self._bulk.move_to_end(icaos)
+                return cached[1]
+        parts = [b.raw if b else _dumps({"icao": i, "error": "unknown station"}) for i, b in zip(icaos, bodies)]
+        body = _Body(b'{"stations":[' + b",".join(parts) + b"]}")
+        with self._lock:
+            self._bulk[icaos] = (etags, body)
+            while len(self._bulk) > BULK_CACHE_SIZE:
+                self._bulk.popitem(last=False)
+        return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    store: ObservationStore
+    server_version = "weather-bot"
+
+    def log_message(self, fmt, *args) -> None:  # route access log through logging
+        logger.debug("%s - %s", self.address_string(), fmt % args)
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        body: _Body | None = None
+        if parts == ["v1", "stations"]:
+            body = self.store.index()
+        elif len(parts) == 3 and parts[:2] == ["v1", "stations"]:
+            body = self.store.latest(parts[2].upper())
+        elif len(parts) == 4 and parts[:2] == ["v1", "stations"] and parts[3] == "history":
+            body = self.store.history(parts[2].upper())
+        elif parts == ["v1", "latest"]:
+            ids = ",".join(parse_qs(url.query).get("ids", []))
+            icaos = tuple(dict.fromkeys(i.strip().upper() for i in ids.split(",") if i.strip()))
+            if not icaos:
+                self._send_error(400, "ids query parameter is required")
+                return
+            body = self.store.bulk(icaos)
+        else:
+            self._send_error(404, "not found")
+            return
+        if body is None:
+            self._send_error(404, "unknown station")
+            return
+        self._send(body)
+
+    def _send(self, body: _Body) -> None:
+        if body.etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", body.etag)
+            self.end_headers()
+            return
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        payload = body.gzipped if use_gzip else body.raw
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", body.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, message: str) -> None:
+        payload = _dumps({"error": message})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(store: ObservationStore, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"store": store})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def _summary(data: parser_module.WeatherData) -> str | None:
+    station = stations.get_station(data.icao, fetch=False)
+    try:
+        return taf_summary.summarize_taf(data.taf_raw, data.taf_issue_time, station.tz if station else "UTC")
+    except Exception as e:  # noqa: BLE001
+        logger.debug("TAF summary failed for %s: %s", data.icao, e)
+        return None
+
+
+def warm_from_db(store: ObservationStore, icaos: list[str], hours: int = 24) -> None:
+    """Seed the store with recent history so a restart does not serve empty data."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    latest: dict[str, parser_module.WeatherData] = {}
+    for icao, metar_time, metar_text, taf_text in db.fetch_recent_raw(icaos, since):
+        try:
+            data = parser_module.decode_metar_taf(icao, metar_text, taf_text, ref_time=datetime.fromisoformat(metar_time))
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Skipping stored row for %s: %s", icao, e)
+            continue
+        store.update(data)
+        latest[icao] = data
+    for data in latest.values():
+        store.update(data, _summary(data))
+    logger.info("Warmed %d stations from the database", len(latest))
+
+
+def refresh_loop(store: ObservationStore, icaos: list[str], stop: threading.Event, fallback_km: float = 0.0) -> None:
+    """Fetch due stations (adaptive schedule) and publish new observations.
+
+    The server only reads the database: storing observations is left to cron runs
+    and workers, whose per-chat delivery claims it would otherwise pre-empt, and
+    its poll plan is kept in memory instead of the shared ``poll_state``.
+    """
+    from .cli import fetch_observation
+
+    next_due: dict[str, datetime] = {}
+    attempts: dict[str, int] = {}
+    while not stop.is_set():
+        now = datetime.now(timezone.utc)
+        for icao in [i for i in icaos if next_due.get(i, now) <= now]:
+            got_new = False
+            try:
+                data, _ = fetch_observation(icao, fallback_km)
+                got_new = store.is_new(data)
+                if got_new:
+                    store.update(data, _summary(data))
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Refresh of %s failed: %s", icao, e)
+            next_due[icao], attempts[icao] = schedule.plan(icao, got_new, attempts.get(icao), now)
+        breaker.save_all()
+        stop.wait(LOOP_TICK_S)
+
+
+def parse_args(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(prog="weather-bot serve", description="Serve latest decoded observations over HTTP")
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--airport", action="append", help="ICAO code (repeatable)")
+    target.add_argument("--bbox", help="Serve every METAR station in lat0,lon0,lat1,lon1")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address")
+    p.add_argument("--port", type=int, default=8080, help="Bind port")
+    p.add_argument("--fallback-km", type=float, default=0.0, help="Nearest-station fallback radius")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    db.init_db()
+    if args.airport:
+        icaos = [a.upper() for a in args.airport]
+    else:
+        from . import spatial
+
+        bbox = tuple(float(v) for v in args.bbox.split(","))
+        icaos = [s.icao for s in spatial.stations_in_bbox(*bbox)]
+
+    store = ObservationStore()
+    warm_from_db(store, icaos)
+    stop = threading.Event()
+    worker = threading.Thread(target=refresh_loop, args=(store, icaos, stop, args.fallback_km), daemon=True)
+    worker.start()
+
+    httpd = make_server(store, args.host, args.port)
+    logger.info("Serving %d stations on http://%s:%d/v1/", len(icaos), args.host, args.port)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        httpd.server_close()
+        worker.join(timeout=LOOP_TICK_S)
+    return 0
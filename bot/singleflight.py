@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # Windows – no cross-process locking, every run does its own work
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache"
+LOCK_TIMEOUT_S = 30.0  # longer than any single upstream timeout
+_POLL_S = 0.1
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _paths(stage: str, key: str) -> tuple[Path, Path]:
+    directory = CACHE_DIR / stage
+    directory.mkdir(parents=True, exist_ok=True)
+    name = _UNSAFE_RE.sub("_", key)
+    return directory / f"{name}.json", directory / f"{name}.lock"
+
+
+def _read(path: Path, ttl: float):
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: Path, value) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(value), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _locked(lock_path: Path):
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a") as fh:
+        deadline = time.monotonic() + LOCK_TIMEOUT_S
+        while True:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.utime(lock_path)  # keep a lock in use out of prune()'s reach
+                break
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    logger.warning("Gave up waiting for %s, doing the work anyway", lock_path.name)
+                    yield
+                    return
+                time.sleep(_POLL_S)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def do(stage: str, key: str, ttl: float, compute: Callable[[], T]) -> T:
+    """Return *compute()* for (*stage*, *key*), computing it once across processes.
+
+    A fresh cached result (younger than *ttl* seconds) is returned straight away.
+    Otherwise the caller takes a file lock for the key; processes arriving meanwhile
+    wait on the lock and then read the result the first one cached. Results must be
+    JSON-serialisable. Failures are not cached – the next waiter simply tries itself.
+    """
+    cache_path, lock_path = _paths(stage, key)
+    cached = _read(cache_path, ttl)
+    if cached is not None:
+        logger.debug("single-flight %s/%s: cache hit", stage, key)
+        return cached
+    with _locked(lock_path):
+        cached = _read(cache_path, ttl)
+        if cached is not None:
+            logger.debug("single-flight %s/%s: computed by another run", stage, key)
+            return cached
+        value = compute()
+        _write(cache_path, value)
+        return value
+
+
+def prune(max_age_s: float = 86400.0) -> int:
+    """Delete cache entries and lock files not touched for *max_age_s*; returns the count."""
+    if not CACHE_DIR.exists():
+        return 0
+    cutoff = time.time() - max_age_s
+    removed = 0
+    for path in CACHE_DIR.glob("*/*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
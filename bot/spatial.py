@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+from .stations import EARTH_RADIUS_KM, Station, catalog, haversine_km
+
+T = TypeVar("T")
+
+class GridIndex(Generic[T]):
+    """Uniform lat/lon grid over point items for bounding-box and k-nearest queries.
+
+    Each query only visits the cells it overlaps (bbox) or rings of cells around the
+    query point until no unvisited cell can hold a closer item (k-nearest), so cost
+    depends on local density rather than on the total number of items.
+    """
+
+    def __init__(self, items: Iterable[T], key: Callable[[T], tuple[float, float]], cell_deg: float = 1.0) -> None:
+        self.cell_deg = cell_deg
+        self._key = key
+        self._rows = math.ceil(180 / cell_deg)
+        self._cols = math.ceil(360 / cell_deg)
+        self._cells: dict[tuple[int, int], list[tuple[float, float, T]]] = defaultdict(list)
+        self._size = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        row = min(int((lat + 90) / self.cell_deg), self._rows - 1)
+        col = int(((lon + 180) % 360) / self.cell_deg) % self._cols
+        return row, col
+
+    def add(self, item: T) -> None:
+        lat, lon = self._key(item)
+        self._cells[self._cell(lat, lon)].append((lat, lon, item))
+        self._size += 1
+
+    def bbox(self, lat0: float, lon0: float, lat1: float, lon1: float) -> Iterator[T]:
+        """Yield items inside the box; ``lon0 > lon1`` means the box crosses the antimeridian."""
+        lat_lo, lat_hi = min(lat0, lat1), max(lat0, lat1)
+        row_lo, col_lo = self._cell(lat_lo, lon0)
+        row_hi, col_hi = self._cell(lat_hi, lon1)
+        crosses = lon0 > lon1
+        if crosses:
+            cols = [*range(col_lo, self._cols), *range(0, col_hi + 1)]
+        elif lon1 >= 180:
+            # 180° wraps to column 0, which also holds items on the antimeridian itself
+            cols = [*range(col_lo, self._cols), *([0] if col_lo else [])]
+        else:
+            cols = range(col_lo, col_hi + 1)
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                for lat, lon, item in self._cells.get((row, col), ()):
+                    if not lat_lo <= lat <= lat_hi:
+                        continue
+                    if crosses:
+                        if lon >= lon0 or lon <= lon1:
+                            yield item
+                    elif lon0 <= lon <= lon1:
+                        yield item
+
+    def _ring(self, row0: int, col0: int, r: int, seen: set[tuple[int, int]]) -> Iterator[tuple[int, int]]:
+        """Yield not yet *seen* cells at Chebyshev distance *r* (columns wrap around)."""
+        if r == 0:
+            seen.add((row0, col0))
+            yield row0, col0
+            return
+        for dr in range(-r, r + 1):
+            row = row0 + dr
+            if not 0 <= row < self._rows:
+                continue
+            dcs = range(-r, r + 1) if abs(dr) == r else (-r, r)
+            for dc in dcs:
+                cell = (row, (col0 + dc) % self._cols)
+                if cell not in seen:
+                    seen.add(cell)
+                    yield cell
+
+    def _outside_bound_km(self, lat: float, r: int) -> float:
+        """Lower bound on the distance to any item outside rings ``0..r``.
+
+        Such an item differs from the query by at least ``r`` cells in latitude or in
+        longitude. Latitude separation is a lower bound on its own; for longitude the
+        closest reachable point lies on the bounding meridian, at
+        ``asin(cos(lat) * sin(dlon))`` from the query.
+        """
+        span = math.radians(r * self.cell_deg)
+        lon_bound = math.asin(min(1.0, math.cos(math.radians(lat)) * math.sin(min(span, math.pi / 2))))
+        return min(span, lon_bound) * EARTH_RADIUS_KM
+
+    def nearest(self, lat: float, lon: float, k: int = 1, max_km: float | None = None) -> list[tuple[float, T]]:
+        """Return up to *k* ``(distance_km, item)`` pairs sorted by distance."""
+        row0, col0 = self._cell(lat, lon)
+        best: list[tuple[float, int, T]] = []  # max-heap via negated distance
+        counter = 0
+        seen: set[tuple[int, int]] = set()
+        max_rings = max(self._rows, self._cols)
+        for r in range(max_rings):
+            for cell in self._ring(row0, col0, r, seen):
+                for p_lat, p_lon, item in self._cells.get(cell, ()):
+                    dist = haversine_km(lat, lon, p_lat, p_lon)
+                    if max_km is not None and dist > max_km:
+                        continue
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, counter, item))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, counter, item))
+            lower_bound = self._outside_bound_km(lat, r)
+            if len(best) == k and lower_bound > -best[0][0]:
+                break
+            if max_km is not None and lower_bound > max_km:
+                break
+        return [(-d, item) for d, _, item in sorted(best, reverse=True)]
+
+
+_INDEX: GridIndex[Station] | None = None
+
+
+def station_index() -> GridIndex[Station]:
+    """Return the process-wide grid index over the station catalog."""
+    global _INDEX
+    if _INDEX is None or len(_INDEX) != len(catalog()):
+        _INDEX = GridIndex(catalog().values(), key=lambda s: (s.lat, s.lon))
+    return _INDEX
+
+
+def nearest_stations(lat: float, lon: float, k: int = 5, max_km: float | None = None, *, metar_only: bool = True) -> list[tuple[float, Station]]:
+    """Closest catalog stations to a point, optionally only those issuing METARs."""
+    index = station_index()
+    if not metar_only:
+        return index.nearest(lat, lon, k, max_km)
+    # Over-fetch a little so filtering out non-reporting sites still leaves k results.
+    candidates = index.nearest(lat, lon, k * 3, max_km)
+    return [(d, s) for d, s in candidates if s.has_metar][:k]
+
+
+def stations_in_bbox(lat0: float, lon0: float, lat1: float, lon1: float, *, metar_only: bool = True) -> list[Station]:
+    found = station_index().bbox(lat0, lon0, lat1, lon1)
+    return sorted((s for s in found if s.has_metar or not metar_only), key=lambda s: s.icao)
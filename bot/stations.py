@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from importlib import resources
+from pathlib import Path
+from typing import Iterable
+
+from dateutil import tz
+
+from . import breaker, db
+
+try:
+    from timezonefinder import TimezoneFinder
+except ImportError:  # optional: without tz polygons, zones come from the zone.tab heuristic
+    TimezoneFinder = None
+
+logger = logging.getLogger(__name__)
+
+STATIONINFO_URL = "https://aviationweather.gov/api/data/stationinfo"
+_SYSTEM_ZONE_TAB = Path("/usr/share/zoneinfo/zone.tab")
+_BATCH = 400  # ids per stationinfo request
+
+EARTH_RADIUS_KM = 6371.0
+# Sub-regional zones (America/Indiana/..., America/Kentucky/...) cover narrow areas, so
+# their reference city only wins when the station is clearly closer to it.
+_SUBREGION_PENALTY_KM = 150.0
+# A heuristic zone is only trusted when its reference city is this close, or when no
+# zone with different UTC offsets is within AMBIGUOUS_RATIO times that distance.
+CONFIDENT_KM = 250.0
+AMBIGUOUS_RATIO = 3.0
+_OFFSET_PROBES = (datetime(2025, 1, 15), datetime(2025, 7, 15))  # winter and summer
+
+
+@dataclass(frozen=True)
+class Station:
+    icao: str
+    name: str | None
+    lat: float
+    lon: float
+    elev_m: int | None
+    country: str | None
+    tz: str
+    site_types: str | None  # comma separated, e.g. "METAR,TAF"
+
+    @property
+    def has_metar(self) -> bool:
+        return "METAR" in (self.site_types or "")
+
+    @property
+    def has_taf(self) -> bool:
+        return "TAF" in (self.site_types or "")
+
+
+# Process-wide caches: catalog is loaded once, tzinfo objects are resolved once per name.
+_CATALOG: dict[str, Station] | None = None
+_TZINFO: dict[str, tzinfo | None] = {}
+_ZONES: list[tuple[str, float, float, str]] | None = None
+_FINDER = None
+_CHECKED_TZ: set[str] = set()  # stations whose stored zone was checked for ambiguity
+
+
+def get_tzinfo(name: str) -> tzinfo | None:
+    """Return a cached tzinfo for *name* (same semantics as ``dateutil.tz.gettz``)."""
+    try:
+        return _TZINFO[name]
+    except KeyError:
+        resolved = _TZINFO[name] = tz.gettz(name)
+        return resolved
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# ---------------- Timezone resolution ------------------
+
+
+def _parse_iso6709(coord: str) -> tuple[float, float]:
+    """Parse zone.tab coordinates such as ``+5545+03735`` or ``+404251-0740023``."""
+    split = max(coord.rfind("+"), coord.rfind("-"))
+    lat_s, lon_s = coord[:split], coord[split:]
+
+    def _deg(part: str, deg_digits: int) -> float:
+        sign = -1 if part[0] == "-" else 1
+        digits = part[1:]
+        deg = int(digits[:deg_digits])
+        minutes = int(digits[deg_digits : deg_digits + 2])
+        seconds = int(digits[deg_digits + 2 :] or 0)
+        return sign * (deg + minutes / 60 + seconds / 3600)
+
+    return _deg(lat_s, 2), _deg(lon_s, 3)
+
+
+def _zone_tab_text() -> str | None:
+    try:
+        return resources.files("tzdata").joinpath("zoneinfo", "zone.tab").read_text(encoding="utf-8")
+    except (ModuleNotFoundError, FileNotFoundError):
+        pass
+    if _SYSTEM_ZONE_TAB.exists():
+        return _SYSTEM_ZONE_TAB.read_text(encoding="utf-8")
+    return None
+
+
+def _zones() -> list[tuple[str, float, float, str]]:
+    global _ZONES
+    if _ZONES is None:
+        zones: list[tuple[str, float, float, str]] = []
+        text = _zone_tab_text() or ""
+        for line in text.splitlines():
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if len(fields) < 3:
+                continue
+            lat, lon = _parse_iso6709(fields[1])
+            zones.append((fields[0], lat, lon, fields[2]))
+        if not zones:
+            logger.warning("zone.tab not found – timezones fall back to fixed UTC offsets")
+        _ZONES = zones
+    return _ZONES
+
+
+def _finder():
+    global _FINDER
+    if _FINDER is None and TimezoneFinder is not None:
+        _FINDER = TimezoneFinder()
+    return _FINDER
+
+
+def _offsets(name: str) -> tuple:
+    zone = get_tzinfo(name)
+    return tuple(zone.utcoffset(probe) if zone else None for probe in _OFFSET_PROBES)
+
+
+def _nearest_zone(lat: float, lon: float, country: str | None) -> tuple[str, bool]:
+    """zone.tab heuristic: ``(zone, ambiguous)`` for the nearest reference city.
+
+    *ambiguous* is set when that city is far away and a zone with other UTC offsets
+    (including a different DST rule) is comparably close. For example, Seattle is
+    nearer to Boise than to Los Angeles, and Albuquerque is as near to Phoenix as to
+    Denver.
+    """
+    zones = _zones()
+    candidates = [z for z in zones if country and z[0] == country.upper()] or zones
+    if not candidates:
+        offset = round(lon / 15)
+        # Etc/GMT signs are inverted: Etc/GMT-3 is UTC+3
+        return ("UTC" if offset == 0 else f"Etc/GMT{-offset:+d}"), True
+
+    def _score(zone: tuple[str, float, float, str]) -> float:
+        penalty = _SUBREGION_PENALTY_KM if zone[3].count("/") > 1 else 0.0
+        return haversine_km(lat, lon, zone[1], zone[2]) + penalty
+
+    ranked = sorted((_score(z), z[3]) for z in candidates)
+    best_km, best = ranked[0]
+    if best_km <= CONFIDENT_KM:
+        return best, False
+    best_offsets = _offsets(best)
+    ambiguous = any(km <= best_km * AMBIGUOUS_RATIO and _offsets(name) != best_offsets for km, name in ranked[1:])
+    return best, ambiguous
+
+
+def resolve_timezone(lat: float, lon: float, country: str | None = None) -> str:
+    """Pick the IANA zone for a location.
+
+    With the optional ``timezonefinder`` package installed, the zone comes from
+    timezone boundary polygons. Otherwise the zone.tab reference city nearest to the
+    station is used, restricted to the station's country when it is known; this can
+    be wrong in large countries (see :func:`timezone_for`). Without zone data, falls
+    back to a fixed ``Etc/GMT±N`` offset derived from longitude. ``--timezone``
+    overrides it.
+    """
+    finder = _finder()
+    if finder is not None:
+        name = finder.timezone_at(lng=lon, lat=lat)
+        if name:
+            return name
+    return _nearest_zone(lat, lon, country)[0]
+
+
+# ---------------- Catalog ------------------
+
+
+def _from_stationinfo(item: dict) -> Station | None:
+    icao = (item.get("icaoId") or "").upper()
+    lat, lon = item.get("lat"), item.get("lon")
+    if not icao or lat is None or lon is None:
+        return None
+    site_types = item.get("siteType") or []
+    if isinstance(site_types, str):
+        site_types = [site_types]
+    elev = item.get("elev")
+    return Station(
+        icao=icao,
+        name=item.get("site"),
+        lat=float(lat),
+        lon=float(lon),
+        elev_m=int(round(elev)) if elev is not None else None,
+        country=item.get("country"),
+        tz=resolve_timezone(float(lat), float(lon), item.get("country")),
+        site_types=",".join(t.upper() for t in site_types) or None,
+    )
+
+
+def _store(stations: list[Station]) -> None:
+    db.upsert_stations(
+        [(s.icao, s.name, s.lat, s.lon, s.elev_m, s.country, s.tz, s.site_types) for s in stations]
+    )
+    if _CATALOG is not None:
+        _CATALOG.update({s.icao: s for s in stations})
+
+
+def import_stationinfo(items: Iterable[dict]) -> int:
+    """Store stationinfo JSON records (API response or offline snapshot)."""
+    stations = [s for s in (_from_stationinfo(i) for i in items) if s is not None]
+    _store(stations)
+    return len(stations)
+
+
+def import_snapshot(path: Path) -> int:
+    """Load a stationinfo JSON snapshot from disk into the catalog."""
+    return import_stationinfo(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def refresh_catalog(ids: Iterable[str] | None = None, bbox: tuple[float, float, float, float] | None = None) -> int:
+    """Bulk-fetch station metadata from AviationWeather for *ids* and/or a *bbox*.
+
+    *bbox* is ``(lat0, lon0, lat1, lon1)``. Returns the number of stored stations.
+    """
+    queries: list[dict] = []
+    if ids:
+        id_list = [i.upper() for i in ids]
+        for start in range(0, len(id_list), _BATCH):
+            queries.append({"ids": ",".join(id_list[start : start + _BATCH])})
+    if bbox:
+        queries.append({"bbox": ",".join(f"{v:g}" for v in bbox)})
+
+    stored = 0
+    for params in queries:
+        logger.debug("Requesting station info %s", params)
+        resp = breaker.get_url(STATIONINFO_URL, params={**params, "format": "json"}, timeout=10)
+        resp.raise_for_status()
+        stored += import_stationinfo(resp.json() if resp.text.strip() else [])
+    return stored
+
+
+def catalog() -> dict[str, Station]:
+    """Return the whole catalog indexed by ICAO, loading it from SQLite once per process."""
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = {row[0]: Station(*row) for row in db.load_stations()}
+    return _CATALOG
+
+
+def get_station(icao: str, *, fetch: bool = True) -> Station | None:
+    """Look up a station, fetching it from AviationWeather on first use when *fetch* is set."""
+    icao = icao.upper()
+    station = catalog().get(icao)
+    if station is None and fetch:
+        refresh_catalog([icao])
+        station = catalog().get(icao)
+    return station
+
+
+def timezone_for(icao: str) -> str:
+    """Stored zone of *icao*; warns once per process when it is an ambiguous guess.
+
+    The nearest-zone scan behind the check runs once per station and process.
+    """
+    station = get_station(icao)
+    if station is None:
+        raise ValueError(f"Unknown station {icao}; pass --timezone explicitly")
+    if station.icao not in _CHECKED_TZ and _finder() is None:
+        _CHECKED_TZ.add(station.icao)
+        guess, ambiguous = _nearest_zone(station.lat, station.lon, station.country)
+        if ambiguous and guess == station.tz:
+            logger.warning(
+                "Timezone %s for %s is a guess from the nearest zone.tab city and may be wrong; "
+                "pass --timezone or install timezonefinder and refresh the catalog",
+                station.tz,
+                station.icao,
+            )
+    return station.tz
+
+
+def parse_args(argv: list[str] | None = None):
+    import argparse
+
+    p = argparse.ArgumentParser(prog="weather-bot stations", description="Populate the local station catalog")
+    p.add_argument("--ids", help="Comma separated ICAO codes to fetch")
+    p.add_argument("--bbox", help="Bounding box lat0,lon0,lat1,lon1 to fetch")
+    p.add_argument("--snapshot", type=Path, help="Import a stationinfo JSON snapshot instead of calling the API")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    db.init_db()
+    stored = 0
+    if args.snapshot:
+        stored += import_snapshot(args.snapshot)
+    if args.ids or args.bbox:
+        bbox = tuple(float(v) for v in args.bbox.split(",")) if args.bbox else None
+        stored += refresh_catalog(args.ids.split(",") if args.ids else None, bbox)
+    logger.info("Station catalog updated: %d stations stored", stored)
+    return 0
@@ -4,79 +4,12 @@ import logging
 import re
 from datetime import datetime, timedelta, timezone
 
-from dateutil import tz
 from dateutil.relativedelta import relativedelta
 
-logger = logging.getLogger(__name__)
+from .locales import DEFAULT_LOCALE, Locale, get_locale
+from .stations import get_tzinfo
 
-_WEATHER_CODES = {
-    # Drizzle
-    "-DZ": "слабая морось 🌧",
-    "DZ": "морось 🌧",
-    "+DZ": "сильная морось 🌧🌧",
-    # Rain
-    "-RA": "слабый дождь 🌧",
-    "RA": "дождь 🌧🌧",
-    "+RA": "сильный дождь 🌧🌧🌧",
-    # Shower rain
-    "-SHRA": "слабый ливневой дождь 🌦",
-    "SHRA": "ливневой дождь 🌦🌦",
-    "+SHRA": "сильный ливневой дождь 🌦🌦🌦",
-    # Thunderstorm
-    "TS": "гроза ⚡️",
-    "-TSRA": "слабая гроза с дождём ⛈️",
-    "TSRA": "гроза с дождём ⛈️",
-    "+TSRA": "сильная гроза с дождём ⛈️",
-    # Other phenomena
-    "BR": "дымка 🌫️",
-    "FG": "туман 😶‍🌫️",
-    "HZ": "мгла 🌫️",
-    "DU": "пыль 💨",
-    "SA": "песок 💨",
-    "BLDU": "пыльная позёмка 💨",
-    "BLSA": "песчаная позёмка 💨",
-    "BLSN": "метель ❄️💨",
-    "-FZDZ": "слабая ледяная морось 🌧❄️",
-    "FZDZ": "ледяная морось 🌧❄️",
-    "+FZDZ": "сильная ледяная морось 🌧❄️❄️",
-    "-FZRA": "слабый ледяной дождь 🌧❄️",
-    "FZRA": "ледяной дождь 🌧❄️",
-    "+FZRA": "сильный ледяной дождь 🌧❄️❄️",
-    "-RASN": "слабый дождь со снегом 🌧❄️",
-    "RASN": "дождь со снегом 🌧❄️",
-    "+RASN": "сильный дождь со снегом 🌧❄️❄️",
-    "-SNRA": "слабый дождь со снегом 🌧❄️",
-    "SNRA": "дождь со снегом 🌧❄️",
-    "+SNRA": "сильный дождь со снегом 🌧❄️❄️",
-    "-SN": "слабый снег ❄️",
-    "SN": "снег ❄️",
-    "+SN": "сильный снег ❄️❄️❄️",
-    "-SHSN": "слабый ливневой снег ❄️",
-    "SHSN": "ливневой снег ❄️❄️❄️",
-    "+SHSN": "сильный ливневой снег ❄️❄️❄️❄️",
-    "-PL": "слабая ледяная крупа 🧊",
-    "PL": "ледяная крупа 🧊",
-    "+PL": "сильная ледяная крупа 🧊🧊",
-    "-SG": "слабые снежные зёрна ❄️",
-    "SG": "снежные зёрна ❄️",
-    "+SG": "сильные снежные зёрна ❄️❄️",
-    "-GR": "слабый град 🌨️",
-    "GR": "град 🌨️",
-    "+GR": "сильный град 🌨️🌨️",
-    "-GS": "слабый мелкий град 🌨️",
-    "GS": "мелкий град 🌨️",
-    "+GS": "сильный мелкий град 🌨️🌨️",
-}
-
-_CLOUD_CODES = {
-    "CLR": "безоблачно ○",
-    "SKC": "безоблачно ○",
-    "NSC": "нет значимой облачности",
-    "FEW": "небольшая облачность ◔",
-    "SCT": "рассеянная облачность ◑",
-    "BKN": "облачность 5-7 октантов ◕",
-    "OVC": "сплошная облачность ●",
-}
+logger = logging.getLogger(__name__)
 
 _WIND_RE = re.compile(r"(?P<dir>\d{3}|VRB)(?P<spd>\d{2})(G(?P<gst>\d{2}))?KT")
 _TIME_RANGE_RE = re.compile(r"(\d{4})/(\d{4})")
@@ -88,60 +21,61 @@ def _kt_to_kmh(kn: str) -> int:
     return int(round(int(kn) * 1.852))
 
 
-def _decode_wind(token: str) -> str | None:
+def _decode_wind(token: str, loc: Locale) -> str | None:
     m = _WIND_RE.match(token)
     if not m:
         return None
     direction = m.group("dir")
     speed_kmh = _kt_to_kmh(m.group("spd"))
     gust = m.group("gst")
-    gust_part = f", порывы {_kt_to_kmh(gust)} км/ч" if gust else ""
+    gust_part = loc.text["gusts"].format(kmh=_kt_to_kmh(gust)) if gust else ""
     if direction == "VRB":
-        return f"переменный ветер {speed_kmh} км/ч{gust_part}"
-    return f"ветер {direction}° {speed_kmh} км/ч{gust_part}"
+        return loc.text["wind_vrb"].format(kmh=speed_kmh, gust=gust_part)
+    return loc.text["wind"].format(dir=direction, kmh=speed_kmh, gust=gust_part)
 
 
-def _decode_weather(tokens: list[str]) -> list[str]:
+def _decode_weather(tokens: list[str], loc: Locale) -> list[str]:
     out = []
     for t in tokens:
-        if t in _WEATHER_CODES:
-            out.append(_WEATHER_CODES[t])
+        if t in loc.weather:
+            out.append(loc.weather[t])
     return out
 
 
-def _decode_cloud(tokens: list[str]) -> list[str]:
+def _decode_cloud(tokens: list[str], loc: Locale) -> list[str]:
     out = []
     for t in tokens:
         # detect cumulonimbus tag
         has_cb = t.endswith("CB")
         base = t[:-2] if has_cb else t
-        for code, desc in _CLOUD_CODES.items():
+        for code, desc in loc.cloud.items():
             if base.startswith(code):
                 height = base[len(code):]
                 if height.isdigit():
                     meters = int(height) * 30.48
-                    out.append(f"{desc} {int(meters)} м")
+                    out.append(loc.text["height"].format(desc=desc, m=int(meters)))
                 else:
                     out.append(desc)
                 if has_cb:
-                    out.append("кучево-дождевые облака")
+                    out.append(loc.text["cb"])
     return out
 
 
-def _format_km(value_km: float) -> str:
+def _format_km(value_km: float, loc: Locale) -> str:
     if value_km.is_integer():
-        return f"{int(value_km)} км"
-    return f"{value_km:.1f} км"
+        return loc.text["km"].format(v=int(value_km))
+    return loc.text["km"].format(v=f"{value_km:.1f}")
 
 
-def _parse_visibility_token(token: str) -> str | None:
+def _parse_visibility_token(token: str, loc: Locale) -> tuple[bool, str] | None:
+    """Return ``(is_greater, distance_text)`` for a visibility group."""
     if token == "9999":
-        return "видимость 10+ км"
+        return False, loc.text["vis_unlimited"]
     if token.isdigit() and len(token) == 4:
         meters = int(token)
         if meters >= 1000:
-            return f"видимость {_format_km(meters / 1000)}"
-        return f"видимость {meters} м"
+            return False, _format_km(meters / 1000, loc)
+        return False, loc.text["m"].format(v=meters)
     m = _VIS_SM_RE.match(token)
     if m:
         is_greater = m.group(1) is not None
@@ -152,22 +86,25 @@ def _parse_visibility_token(token: str) -> str | None:
             frac = 0.0
         miles = whole + frac
         km = miles * 1.60934
-        sign = "> " if is_greater else ""
-        return f"видимость {sign}{_format_km(km)}"
+        return is_greater, _format_km(km, loc)
     return None
 
 
-def _decode_visibility(tokens: list[str]) -> list[str]:
+def _visibilities(tokens: list[str], loc: Locale) -> list[tuple[bool, str]]:
     out = []
     for t in tokens:
         if t == "CAVOK":
             continue
-        vis = _parse_visibility_token(t)
+        vis = _parse_visibility_token(t, loc)
         if vis:
             out.append(vis)
     return out
 
 
+def _decode_visibility(tokens: list[str], loc: Locale) -> list[str]:
+    return [loc.text["visibility"].format(sign="> " if greater else "", v=v) for greater, v in _visibilities(tokens, loc)]
+
+
 def _strip_base_header_tokens(tokens: list[str]) -> list[str]:
     idx = 0
     if idx < len(tokens) and _ISSUE_TIME_RE.match(tokens[idx]):
@@ -177,22 +114,10 @@ def _strip_base_header_tokens(tokens: list[str]) -> list[str]:
     return tokens[idx:]
 
 
-def _visibility_change_text(visibility_desc: list[str]) -> str:
-    cleaned = []
-    for v in visibility_desc:
-        if v.startswith("видимость > "):
-            cleaned.append("более " + v[len("видимость > "):])
-        elif v.startswith("видимость "):
-            cleaned.append(v[len("видимость "):])
-        else:
-            cleaned.append(v)
-    prefixed = []
-    for v in cleaned:
-        if v.startswith("более "):
-            prefixed.append(v)
-        else:
-            prefixed.append("до " + v)
-    return ", ".join(prefixed)
+def _visibility_change_text(tokens: list[str], loc: Locale) -> str:
+    return ", ".join(
+        loc.text["vis_more" if greater else "vis_upto"].format(v=v) for greater, v in _visibilities(tokens, loc)
+    )
 
 
 def _range_to_local(start_token: str, end_token: str, issue_dt: datetime, tz_str: str):
@@ -218,20 +143,22 @@ def _range_to_local(start_token: str, end_token: str, issue_dt: datetime, tz_str
             dt += relativedelta(months=1)
         return dt
 
-    local_tz = tz.gettz(tz_str)
+    local_tz = get_tzinfo(tz_str)
     start_dt_local = _to_dt(start_day, start_hour).astimezone(local_tz)
     end_dt_local = _to_dt(end_day, end_hour).astimezone(local_tz)
 
     return start_dt_local, end_dt_local
 
 
-def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str) -> str:
-    """Return human-readable summary of key TAF changes."""
+def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str, locale: str = DEFAULT_LOCALE) -> str:
+    """Return human-readable summary of key TAF changes in *locale*."""
 
     lines = [l.strip() for l in taf_raw.splitlines() if l.strip()]
     summaries: list[str] = []
     prob_prefix: str | None = None
-    now_local = datetime.now(tz.gettz(tz_str))
+    now_local = datetime.now(get_tzinfo(tz_str))
+    loc = get_locale(locale)
+    text = loc.text
 
     # First line may start with DDHH/DDHH or wind etc.
     for line in lines:
@@ -251,37 +178,37 @@ def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str) -> str:
                     if end_local_dt <= now_local:
                         continue  # interval already past
                     start_local = start_local_dt.strftime('%H:%M'); end_local = end_local_dt.strftime('%H:%M')
-                    time_range_text = f"({start_local}-{end_local}) "
+                    time_range_text = text["range"].format(start=start_local, end=end_local)
                     idx += 1
 
                 # If there are tokens after the (optional) time-range, treat them as conditions of this PROB group.
                 if len(tokens) > idx:
                     conditions_tokens = tokens[idx:]
                     pieces = []
-                    pieces.extend(_decode_weather(conditions_tokens))
-                    visibility_desc = _decode_visibility(conditions_tokens)
+                    pieces.extend(_decode_weather(conditions_tokens, loc))
+                    visibility_desc = _decode_visibility(conditions_tokens, loc)
                     wind_desc = None
                     for t in conditions_tokens:
-                        w = _decode_wind(t)
+                        w = _decode_wind(t, loc)
                         if w:
                             wind_desc = w
                             break
                     if wind_desc:
                         pieces.append(wind_desc)
                     pieces.extend(visibility_desc)
-                    pieces.extend(_decode_cloud(conditions_tokens))
+                    pieces.extend(_decode_cloud(conditions_tokens, loc))
                     if "CAVOK" in conditions_tokens:
-                        pieces.append("CAVOK (видимость >10 км, нет значимой облачности)")
-                    cond_text = ", ".join(pieces) if pieces else "изменение погоды"
+                        pieces.append(text["cavok_long"])
+                    cond_text = ", ".join(pieces) if pieces else text["change"]
                     if visibility_desc and len(pieces) == len(visibility_desc):
-                        vis_text = _visibility_change_text(visibility_desc)
-                        summaries.append(f"Вероятность {prob}% {time_range_text}изменение видимости: {vis_text}.")
+                        vis_text = _visibility_change_text(conditions_tokens, loc)
+                        summaries.append(text["prob"].format(prob=prob, range=time_range_text) + text["vis_change"].format(vis=vis_text) + ".")
                     else:
-                        summaries.append(f"Вероятность {prob}% {time_range_text}{cond_text}.")
+                        summaries.append(text["prob"].format(prob=prob, range=time_range_text) + cond_text + ".")
                     prob_prefix = None
                 else:
                     # No condition tokens yet – keep prefix for the following line.
-                    prob_prefix = f"Вероятность {prob}% {time_range_text}"
+                    prob_prefix = text["prob"].format(prob=prob, range=time_range_text)
                 continue
 
             if first == "BECMG":
@@ -295,27 +222,25 @@ def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str) -> str:
                     conditions_tokens = tokens[2:]
                     wind_desc = None
                     for t in conditions_tokens:
-                        w = _decode_wind(t)
+                        w = _decode_wind(t, loc)
                         if w:
                             wind_desc = w
                             break
                     pieces = []
                     if wind_desc:
                         pieces.append(wind_desc)
-                    pieces.extend(_decode_weather(conditions_tokens))
-                    visibility_desc = _decode_visibility(conditions_tokens)
+                    pieces.extend(_decode_weather(conditions_tokens, loc))
+                    visibility_desc = _decode_visibility(conditions_tokens, loc)
                     pieces.extend(visibility_desc)
-                    pieces.extend(_decode_cloud(conditions_tokens))
+                    pieces.extend(_decode_cloud(conditions_tokens, loc))
                     if "CAVOK" in conditions_tokens:
-                        pieces.append("CAVOK (видимость >10 км, нет значимой облачности)")
-                    cond_text = ", ".join(pieces) if pieces else "изменение погоды"
+                        pieces.append(text["cavok_long"])
+                    cond_text = ", ".join(pieces) if pieces else text["change"]
                     if visibility_desc and len(pieces) == len(visibility_desc):
-                        vis_text = _visibility_change_text(visibility_desc)
-                        summaries.append(
-                            f"В интервале {start_local}-{end_local} ожидается изменение видимости: {vis_text}."
-                        )
+                        vis_text = _visibility_change_text(conditions_tokens, loc)
+                        summaries.append(text["becmg_vis"].format(start=start_local, end=end_local, vis=vis_text))
                     else:
-                        summaries.append(f"В интервале {start_local}-{end_local} ожидается изменение к: {cond_text}.")
+                        summaries.append(text["becmg"].format(start=start_local, end=end_local, cond=cond_text))
             elif first == "TEMPO":
                 if len(tokens) >= 2 and _TIME_RANGE_RE.match(tokens[1]):
                     start_token, end_token = _TIME_RANGE_RE.match(tokens[1]).groups()
@@ -325,27 +250,27 @@ def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str) -> str:
                     start_local = start_local_dt.strftime('%H:%M'); end_local = end_local_dt.strftime('%H:%M')
                     conditions_tokens = tokens[2:]
                     pieces = []
-                    pieces.extend(_decode_weather(conditions_tokens))
-                    visibility_desc = _decode_visibility(conditions_tokens)
+                    pieces.extend(_decode_weather(conditions_tokens, loc))
+                    visibility_desc = _decode_visibility(conditions_tokens, loc)
                     wind_desc = None
                     for t in conditions_tokens:
-                        w = _decode_wind(t)
+                        w = _decode_wind(t, loc)
                         if w:
                             wind_desc = w
                             break
                     if wind_desc:
                         pieces.append(wind_desc)
                     pieces.extend(visibility_desc)
-                    pieces.extend(_decode_cloud(conditions_tokens))
+                    pieces.extend(_decode_cloud(conditions_tokens, loc))
                     if "CAVOK" in conditions_tokens:
-                        pieces.append("CAVOK (видимость >10 км, нет значимой облачности)")
-                    cond_text = ", ".join(pieces) if pieces else "временное изменение погоды"
-                    prefix = prob_prefix or "Временами "
+                        pieces.append(text["cavok_long"])
+                    cond_text = ", ".join(pieces) if pieces else text["tempo_change"]
+                    prefix = prob_prefix or text["tempo"]
                     if visibility_desc and len(pieces) == len(visibility_desc):
-                        vis_text = _visibility_change_text(visibility_desc)
-                        summaries.append(f"{prefix}({start_local}-{end_local}) изменение видимости: {vis_text}.")
+                        vis_text = _visibility_change_text(conditions_tokens, loc)
+                        summaries.append(prefix + text["range"].format(start=start_local, end=end_local) + text["vis_change"].format(vis=vis_text) + ".")
                     else:
-                        summaries.append(f"{prefix}({start_local}-{end_local}) {cond_text}.")
+                        summaries.append(prefix + text["range"].format(start=start_local, end=end_local) + cond_text + ".")
                     prob_prefix = None
             elif first.startswith("PROB"):
                 # Standalone PROB lines handled earlier by setting prob_prefix
@@ -356,23 +281,23 @@ def summarize_taf(taf_raw: str, issue_dt: datetime, tz_str: str) -> str:
             pieces = []
             wind_desc = None
             for t in conditions_tokens:
-                w = _decode_wind(t)
+                w = _decode_wind(t, loc)
                 if w:
                     wind_desc = w
                     break
             if wind_desc:
                 pieces.append(wind_desc)
-            pieces.extend(_decode_weather(conditions_tokens))
-            pieces.extend(_decode_visibility(conditions_tokens))
-            pieces.extend(_decode_cloud(conditions_tokens))
+            pieces.extend(_decode_weather(conditions_tokens, loc))
+            pieces.extend(_decode_visibility(conditions_tokens, loc))
+            pieces.extend(_decode_cloud(conditions_tokens, loc))
             if "CAVOK" in conditions_tokens:
-                pieces.append("CAVOK (видимость >10 км, нет значимой облачности)")
+                pieces.append(text["cavok_long"])
             if pieces:
                 base_text = ", ".join(pieces)
                 if prob_prefix:
                     summaries.append(prob_prefix + base_text + ".")
                     prob_prefix = None
                 else:
-                    summaries.append("Основной прогноз: " + base_text + ".")
+                    summaries.append(text["base"] + base_text + ".")
 
     return "\n".join(summaries) if summaries else taf_raw
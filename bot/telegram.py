@@ -1,13 +1,49 @@
 from __future__ import annotations
 
+import json
 import logging
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
-import requests
+from . import breaker
 
 logger = logging.getLogger(__name__)
 
+# Bot API limits
+MAX_MESSAGE = 4096
+MAX_CAPTION = 1024
+MAX_MEDIA_GROUP = 10
+
+
+def _pack(pieces: Iterable[str], sep: str, limit: int) -> list[str]:
+    """Greedily join *pieces* with *sep* into chunks of at most *limit* chars."""
+    chunks: list[str] = []
+    current: str | None = None
+    for piece in pieces:
+        if current is not None and len(current) + len(sep) + len(piece) <= limit:
+            current += sep + piece
+            continue
+        if current is not None:
+            chunks.append(current)
+        current = piece
+    if current is not None:
+        chunks.append(current)
+    return chunks
+
+
+def split_text(text: str, limit: int = MAX_MESSAGE) -> list[str]:
+    """Split *text* into chunks of at most *limit* chars, preferring paragraph and line breaks."""
+    chunks: list[str] = []
+    for paragraph in _pack(text.split("\n\n"), "\n\n", limit):
+        if len(paragraph) <= limit:
+            chunks.append(paragraph)
+            continue
+        # a single paragraph over the limit: break it by lines, hard-cut overlong lines
+        lines = [line[i : i + limit] for line in paragraph.split("\n") for i in range(0, max(len(line), 1), limit)]
+        chunks.extend(_pack(lines, "\n", limit))
+    return [c for c in chunks if c.strip()]
+
 
 class TelegramClient:
     def __init__(self, token: str, chat_id: str | int) -> None:
@@ -18,7 +54,8 @@ class TelegramClient:
     def _request(self, method: str, params: dict, files: Optional[dict] = None):
         url = f"{self.base_url}/{method}"
         logger.debug("Telegram %s: %s", method, params)
-        resp = requests.post(url, params=params, files=files, timeout=10) if files else requests.get(url, params=params, timeout=10)
+        # POST form data: long messages do not fit in a query string
+        resp = breaker.post_url(url, data=params, files=files, timeout=10)
         resp.raise_for_status()
         return resp.json()
 
@@ -32,3 +69,34 @@ class TelegramClient:
                 {"chat_id": self.chat_id, "caption": caption} if caption else {"chat_id": self.chat_id},
                 files={"photo": img},
             )
+
+    def send_media_group(self, photo_paths: Iterable[Path], caption: str | None = None) -> None:
+        """Send photos as albums of up to ten; *caption* goes on the first photo."""
+        paths = list(photo_paths)
+        for start in range(0, len(paths), MAX_MEDIA_GROUP):
+            group = paths[start : start + MAX_MEDIA_GROUP]
+            group_caption = caption if start == 0 else None
+            if len(group) == 1:  # albums need at least two items
+                self.send_photo(group[0], caption=group_caption)
+                continue
+            with ExitStack() as stack:
+                files = {f"photo{i}": stack.enter_context(open(path, "rb")) for i, path in enumerate(group)}
+                media = [{"type": "photo", "media": f"attach://photo{i}"} for i in range(len(group))]
+                if group_caption:
+                    media[0]["caption"] = group_caption
+                self._request("sendMediaGroup", {"chat_id": self.chat_id, "media": json.dumps(media)}, files=files)
+
+    def send_report(self, text: str, photo_paths: Iterable[Path] = ()) -> None:
+        """Send *text* with charts in as few calls as the size limits allow.
+
+        The text rides along as the caption when it fits; otherwise the charts go
+        first and the text follows in messages of at most :data:`MAX_MESSAGE` chars.
+        """
+        paths = list(photo_paths)
+        if paths and len(text) <= MAX_CAPTION:
+            self.send_media_group(paths, caption=text)
+            return
+        if paths:
+            self.send_media_group(paths)
+        for chunk in split_text(text):
+            self.send_message(chunk)
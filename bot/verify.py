@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from dateutil.relativedelta import relativedelta
+
+from . import db
+from .alerts import phenomena_codes
+from .changes import ceiling_ft
+from .parser import WeatherData
+
+logger = logging.getLogger(__name__)
+
+ELEMENTS = ("wind", "visibility", "ceiling", "phenomena")
+WINDOW_DAYS = 30  # reliability shown in reports
+KEEP_DAYS = 90  # daily buckets older than this are dropped by db.cleanup
+MIN_SAMPLES = 20  # don't show a percentage based on fewer observations
+
+# ICAO Annex 3, Attachment B: operationally desirable accuracy of TAFs
+DIR_TOLERANCE_DEG = 20
+DIR_MIN_SPEED_KT = 10  # direction of lighter winds is not verified
+SPEED_TOLERANCE_KT = 5
+VIS_ABS_TOLERANCE_M = 200  # up to 800 m, relative above
+CEILING_ABS_TOLERANCE_FT = 100  # up to 1000 ft, relative above
+RELATIVE_TOLERANCE = 0.3
+UNLIMITED_VIS_M = 10000
+UNLIMITED_CEILING_FT = 20000
+
+_PRECIPITATION = frozenset({"DZ", "RA", "SN", "SG", "IC", "PL", "GR", "GS", "UP"})
+_WEATHER_PIECES = _PRECIPITATION | {
+    "MI", "BC", "PR", "DR", "BL", "SH", "TS", "FZ", "BR", "FG", "FU", "VA", "DU", "SA", "HZ", "PO", "SQ", "FC", "SS", "DS",
+}  # fmt: skip
+
+_ISSUE_RE = re.compile(r"^\d{6}Z$")
+_PERIOD_RE = re.compile(r"^(\d{2})(\d{2})/(\d{2})(\d{2})$")
+_FM_RE = re.compile(r"^FM(\d{2})(\d{2})(\d{2})$")
+_PROB_RE = re.compile(r"^PROB\d{2}$")
+_WIND_RE = re.compile(r"^(\d{3}|VRB)(\d{2,3})(?:G(\d{2,3}))?(KT|MPS)$")
+_VIS_SM_RE = re.compile(r"^P?(\d+)?(?:(\d+)/(\d+))?SM$")
+_CLOUD_RE = re.compile(r"^(FEW|SCT|BKN|OVC|VV)(\d{3})")
+
+
+@dataclass
+class _Group:
+    kind: str  # BASE, FM, BECMG or TEMPO (TEMPO also covers PROBxx)
+    start: datetime
+    end: datetime | None
+    cond: dict = field(default_factory=dict)
+
+
+def _resolve(day: int, hour: int, minute: int, issue: datetime) -> datetime:
+    base = issue.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day < issue.day - 7:  # validity runs into the next month
+        base += relativedelta(months=1)
+    try:
+        dt = base.replace(day=day)
+    except ValueError:
+        dt = base + relativedelta(day=31)
+    return dt + timedelta(hours=hour, minutes=minute)  # hour 24 rolls over to the next day
+
+
+def _period(token: str, issue: datetime) -> tuple[datetime, datetime] | None:
+    m = _PERIOD_RE.match(token)
+    if not m:
+        return None
+    d1, h1, d2, h2 = (int(g) for g in m.groups())
+    return _resolve(d1, h1, 0, issue), _resolve(d2, h2, 0, issue)
+
+
+def _conditions(tokens: list[str]) -> dict:
+    """Forecast elements stated in a group; unstated elements are absent from the dict."""
+    cond: dict = {}
+    clouds: list[float] = []
+    saw_cloud = False
+    weather: set[str] = set()
+    saw_weather = False
+    whole_miles = 0  # "1 1/2SM" spans two tokens
+    for token in tokens:
+        if token.isdigit() and len(token) == 1:
+            whole_miles = int(token)
+            continue
+        if token == "CAVOK":
+            cond["visibility_m"] = UNLIMITED_VIS_M
+            saw_cloud = True
+            saw_weather = True
+            continue
+        if token == "NSW":
+            saw_weather = True
+            continue
+        if token in ("NSC", "SKC", "CLR"):
+            saw_cloud = True
+            continue
+        m = _WIND_RE.match(token)
+        if m:
+            factor = 1.944 if m.group(4) == "MPS" else 1.0
+            cond["wind_dir_deg"] = None if m.group(1) == "VRB" else int(m.group(1))
+            cond["wind_speed_kt"] = int(m.group(2)) * factor
+            continue
+        if token.isdigit() and len(token) == 4:
+            cond["visibility_m"] = UNLIMITED_VIS_M if token == "9999" else int(token)
+            continue
+        m = _VIS_SM_RE.match(token)
+        if m and (m.group(1) or m.group(2)):
+            miles = int(m.group(1) or whole_miles) + (int(m.group(2)) / int(m.group(3)) if m.group(2) else 0)
+            cond["visibility_m"] = UNLIMITED_VIS_M if token.startswith("P") else min(miles * 1609.34, UNLIMITED_VIS_M)
+            continue
+        m = _CLOUD_RE.match(token)
+        if m:
+            saw_cloud = True
+            if m.group(1) in ("BKN", "OVC", "VV"):
+                clouds.append(int(m.group(2)) * 100)
+            continue
+        body = token.lstrip("+-")
+        if body.startswith("VC") or len(body) % 2 or not body:
+            continue
+        pieces = {body[i : i + 2] for i in range(0, len(body), 2)}
+        if pieces <= _WEATHER_PIECES:
+            weather |= pieces
+            saw_weather = True
+    if saw_cloud:
+        cond["ceiling_ft"] = min(clouds) if clouds else math.inf
+    if saw_weather:
+        cond["phenomena"] = _categories(weather)
+    return cond
+
+
+def _categories(codes: Iterable[str]) -> tuple[bool, bool, bool]:
+    """Compare weather as (precipitation, thunderstorm, fog) rather than exact codes."""
+    codes = set(codes)
+    return bool(codes & _PRECIPITATION), "TS" in codes, "FG" in codes
+
+
+def parse_taf(taf_raw: str, issue_time: datetime) -> tuple[datetime, datetime, list[_Group]] | None:
+    """Split a stored TAF into change groups with absolute validity times.
+
+    Returns ``(valid_from, valid_to, groups)``, or ``None`` if no validity period is found.
+    """
+    tokens = taf_raw.split()
+    while tokens and (tokens[0] in ("TAF", "AMD", "COR", "RTD") or _ISSUE_RE.match(tokens[0])):
+        tokens = tokens[1:]
+    while tokens and not _PERIOD_RE.match(tokens[0]):
+        tokens = tokens[1:]  # station identifier or other header leftovers
+    if not tokens:
+        return None
+    valid_from, valid_to = _period(tokens[0], issue_time)
+
+    groups = [_Group("BASE", valid_from, valid_to)]
+    current: list[str] = []
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        fm = _FM_RE.match(token)
+        if fm or token in ("BECMG", "TEMPO") or _PROB_RE.match(token):
+            groups[-1].cond = _conditions(current)
+            current = []
+            if fm:
+                day, hour, minute = (int(g) for g in fm.groups())
+                groups.append(_Group("FM", _resolve(day, hour, minute, issue_time), None))
+            else:
+                kind = "BECMG" if token == "BECMG" else "TEMPO"
+                if _PROB_RE.match(token) and i + 1 < len(tokens) and tokens[i + 1] == "TEMPO":
+                    i += 1
+                period = _period(tokens[i + 1], issue_time) if i + 1 < len(tokens) else None
+                if period is None:
+                    groups.append(_Group("TEMPO", valid_to, valid_to))  # malformed – never valid
+                else:
+                    groups.append(_Group(kind, *period))
+                    i += 1
+        else:
+            current.append(token)
+        i += 1
+    groups[-1].cond = _conditions(current)
+    for g in groups:
+        if g.kind in ("BASE", "FM"):
+            g.cond.setdefault("phenomena", _categories(()))  # a full forecast without weather means none
+    return valid_from, valid_to, groups
+
+
+def candidates(groups: list[_Group], at: datetime) -> list[dict]:
+    """Forecast states allowed at *at*: the prevailing one plus BECMG/TEMPO/PROB alternatives."""
+    prevailing: dict = {}
+    transitions: list[dict] = []
+    for g in groups:
+        if g.start > at:
+            continue
+        if g.kind in ("BASE", "FM"):
+            prevailing, transitions = dict(g.cond), []
+        elif g.kind == "BECMG":
+            if g.end is not None and g.end <= at:
+                prevailing = {**prevailing, **g.cond}
+            else:
+                transitions.append(g.cond)
+    states = [prevailing]
+    states.extend({**prevailing, **c} for c in transitions)
+    states.extend({**prevailing, **g.cond} for g in groups if g.kind == "TEMPO" and g.start <= at < g.end)
+    return states
+
+
+def _within(forecast: float, observed: float, absolute: float, threshold: float) -> bool:
+    tolerance = absolute if forecast <= threshold else forecast * RELATIVE_TOLERANCE
+    return abs(forecast - observed) <= tolerance
+
+
+def _wind_ok(state: dict, data: WeatherData) -> bool:
+    if abs(state["wind_speed_kt"] - data.wind_speed_kt) > SPEED_TOLERANCE_KT:
+        return False
+    fc_dir, obs_dir = state.get("wind_dir_deg"), data.wind_dir_deg
+    if fc_dir is None or obs_dir is None or max(state["wind_speed_kt"], data.wind_speed_kt) < DIR_MIN_SPEED_KT:
+        return True
+    diff = abs(fc_dir - obs_dir) % 360
+    return min(diff, 360 - diff) <= DIR_TOLERANCE_DEG
+
+
+def score(states: list[dict], data: WeatherData) -> dict[str, bool]:
+    """Per element: did any allowed forecast state match the observation?
+
+    Elements the TAF does not mention, or the METAR does not report, are left out.
+    """
+    observed_ceiling = ceiling_ft(data.metar_raw)
+    observed = {
+        "wind": data.wind_speed_kt is not None,
+        "visibility": data.visibility_m is not None,
+        "ceiling": True,
+        "phenomena": True,
+    }
+    checks = {
+        "wind": ("wind_speed_kt", lambda s: _wind_ok(s, data)),
+        "visibility": (
+            "visibility_m",
+            lambda s: min(s["visibility_m"], UNLIMITED_VIS_M) == min(data.visibility_m, UNLIMITED_VIS_M)
+            or _within(s["visibility_m"], min(data.visibility_m, UNLIMITED_VIS_M), VIS_ABS_TOLERANCE_M, 800),
+        ),
+        "ceiling": (
+            "ceiling_ft",
+            lambda s: _within(
+                min(s["ceiling_ft"], UNLIMITED_CEILING_FT),
+                min(observed_ceiling or math.inf, UNLIMITED_CEILING_FT),
+                CEILING_ABS_TOLERANCE_FT,
+                1000,
+            ),
+        ),
+        "phenomena": ("phenomena", lambda s: s["phenomena"] == _categories(phenomena_codes(data))),
+    }
+    result: dict[str, bool] = {}
+    for element, (key, ok) in checks.items():
+        applicable = [s for s in states if key in s]
+        if applicable and observed[element]:
+            result[element] = any(ok(s) for s in applicable)
+    return result
+
+
+def verify_observation(data: WeatherData) -> dict[str, bool]:
+    """Score *data* against the TAF that was current when it was observed."""
+    parsed = parse_taf(data.taf_raw, data.taf_issue_time)
+    if parsed is None:
+        return {}
+    valid_from, valid_to, groups = parsed
+    if not valid_from <= data.metar_time < valid_to:
+        return {}
+    return score(candidates(groups, data.metar_time), data)
+
+
+def record(batch: Iterable[WeatherData]) -> int:
+    """Fold new observations into the daily per-station counters; returns how many were scored.
+
+    Each station's watermark (last verified METAR time) is saved with the counters,
+    so replays and overlapping runs never count an observation twice and nothing is
+    ever recomputed from history.
+    """
+    batch = sorted(batch, key=lambda d: d.metar_time)
+    if not batch:
+        return 0
+    watermarks = db.load_verify_watermarks({d.icao for d in batch})
+    counters: dict[tuple[str, str, str], list[int]] = defaultdict(lambda: [0, 0])
+    covered: dict[str, tuple[str, str]] = {}  # icao -> (first, last) METAR time scored now
+    scored = 0
+    for data in batch:
+        metar_time = data.metar_time.isoformat(timespec="seconds")
+        first, last = covered.get(data.icao, (None, watermarks.get(data.icao, "")))
+        if metar_time <= last:
+            continue
+        covered[data.icao] = (first or metar_time, metar_time)
+        try:
+            result = verify_observation(data)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("TAF verification failed for %s: %s", data.icao, e)
+            continue
+        day = data.metar_time.date().isoformat()
+        for element, hit in result.items():
+            counter = counters[(data.icao, day, element)]
+            counter[0] += int(hit)
+            counter[1] += 1
+        scored += bool(result)
+    db.save_verification([(*key, hits, total) for key, (hits, total) in counters.items()], covered)
+    return scored
+
+
+@dataclass(frozen=True)
+class Reliability:
+    days: int
+    samples: int
+    ratios: dict[str, float]  # element -> share of observations within tolerance
+
+
+def reliability(icaos: set[str], days: int = WINDOW_DAYS, now: datetime | None = None) -> dict[str, Reliability]:
+    """Per-station hit rates over the last *days* days, from at most *days* buckets per element."""
+    now = now or datetime.now(timezone.utc)
+    since = (now - timedelta(days=days)).date().isoformat()
+    totals: dict[str, dict[str, tuple[int, int]]] = defaultdict(dict)
+    for icao, element, hits, total in db.load_verification(icaos, since):
+        totals[icao][element] = (hits, total)
+    out: dict[str, Reliability] = {}
+    for icao, elements in totals.items():
+        samples = max(total for _, total in elements.values())
+        ratios = {e: hits / total for e, (hits, total) in elements.items() if total >= MIN_SAMPLES}
+        if ratios:
+            out[icao] = Reliability(days, samples, {e: ratios[e] for e in ELEMENTS if e in ratios})
+    return out
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from . import breaker, cli, db
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = timedelta(seconds=90)
+POLL_INTERVAL = timedelta(minutes=1)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps the worker's leases alive while a slow round is still running."""
+
+    def __init__(self, worker_id: str, pool: str, ttl: timedelta) -> None:
+        super().__init__(name="lease-heartbeat", daemon=True)
+        self.worker_id = worker_id
+        self.pool = pool
+        self.ttl = ttl
+        self.stop = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop.wait(self.ttl.total_seconds() / 3):
+            try:
+                held = db.renew_leases(self.worker_id, self.pool, self.ttl)
+                logger.debug("Heartbeat: %d leases held", held)
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Lease heartbeat failed: %s", e)
+
+
+def run(args, stop: threading.Event | None = None) -> int:
+    """Lease a fair share of the stations and process it every ``--interval`` seconds.
+
+    Leases only spread the polling load; the per-observation claim made in
+    :func:`bot.cli.process_stations` is what keeps a station that changed hands
+    mid-round from being reported twice. Workers only share stations with their
+    ``--pool`` (by default, workers reporting to the same chat).
+    """
+    stop = stop or threading.Event()
+    ttl = timedelta(seconds=args.lease_ttl)
+    db.init_db()
+    airports = cli._resolve_airports(args)
+    pool = args.pool or str(args.chat)
+    heartbeat = _Heartbeat(args.worker_id, pool, ttl)
+    heartbeat.start()
+    logger.info("Worker %s sharing %d stations in pool %s", args.worker_id, len(airports), pool)
+    exit_code = 0
+    try:
+        while not stop.is_set():
+            owned = db.acquire_leases(args.worker_id, pool, airports, ttl)
+            logger.debug("Worker %s owns %s", args.worker_id, ", ".join(owned) or "nothing")
+            if owned:
+                exit_code = cli.process_stations(args, owned, owner=args.worker_id) or exit_code
+            breaker.save_all()
+            stop.wait(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        heartbeat.stop.set()
+        db.release_leases(args.worker_id, pool)  # let the others pick our stations up right away
+    return exit_code
+
+
+def parse_args(argv: list[str] | None = None):
+    p = cli.build_parser(prog="weather-bot worker")
+    p.add_argument("--worker-id", default=default_worker_id(), help="Unique worker name (default: host:pid)")
+    p.add_argument(
+        "--pool", help="Workers sharing one station set; give the same value to all of them (default: the chat ID)"
+    )
+    p.add_argument("--lease-ttl", type=float, default=LEASE_TTL.total_seconds(), help="Station lease lifetime in seconds")
+    p.add_argument("--interval", type=float, default=POLL_INTERVAL.total_seconds(), help="Seconds between rounds")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    try:
+        return run(args)
+    except Exception:  # noqa: BLE001
+        cli._report_error(args)
+        return 1